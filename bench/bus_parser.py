@@ -0,0 +1,88 @@
+"""
+버스 도착 정보 파서 micro-benchmark.
+
+    python bench/bus_parser.py [반복 횟수]
+
+fixtures/ 의 getArrInfoByRoute 응답 XML 로 이전 구현(legacy_bus.py: xmltodict + 호출마다 정규식)과
+현재 bus.parse_arrivals + process_item_list (+ 응답용 format_bus_info_json) 를 비교하고,
+두 결과가 같은지도 확인 (expected_current 에 적은 의도된 표시 변경만 허용).
+"""
+import os
+import re
+import sys
+import timeit
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import legacy_bus  # noqa: E402
+from bus import format_clock, kst, parse_arrivals, process_item_list, format_bus_info_json  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FrozenDatetime(datetime):
+    # 이전 구현이 호출하는 datetime.now(kst) 를 비교 기준 시각으로 고정
+    frozen = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.frozen
+
+
+legacy_bus.datetime = FrozenDatetime
+
+
+def legacy_parse(xml, now):
+    # 이전 get_bus_arrival 과 같은 흐름 (upstream 요청 대신 fixture)
+    FrozenDatetime.frozen = now
+    item_list = legacy_bus.parse_item_list(SimpleNamespace(text=xml.decode("utf-8")))
+    return legacy_bus.process_item_list(item_list) if item_list else []
+
+
+def current_parse(xml, now):
+    arrivals = parse_arrivals(xml)
+    snapshots = process_item_list(arrivals, now.timestamp()) if arrivals else []
+    return [format_bus_info_json(s) for s in snapshots]
+
+
+MINUTES_ONLY = re.compile(r"^(\d+)분$")
+SECONDS_ONLY = re.compile(r"^(\d+)초$")
+
+
+def expected_current(bus, now):
+    """
+    이전 결과에 user-022 의 의도된 변경을 반영한 값 (표시 문자열은 이전과 같음).
+    - 초 없는 "N분": 도착 예정 시각 = 조회 시각 + N분 (이전: 조회 시각)
+    - 분 없는 "N초": 도착 예정 시각 = 조회 시각 + N초 (이전: 조회 시각)
+    """
+    eta = bus["eta"] or ""
+    minutes = MINUTES_ONLY.match(eta)
+    seconds = SECONDS_ONLY.match(eta)
+    if minutes:
+        return {**bus, "arrival_time": format_clock(now + timedelta(minutes=int(minutes.group(1))))}
+    if seconds:
+        return {**bus, "arrival_time": format_clock(now + timedelta(seconds=int(seconds.group(1))))}
+    return bus
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    now = FrozenDatetime.fromtimestamp(int(datetime.now(kst).timestamp()), kst)
+
+    for name in sorted(os.listdir(FIXTURE_DIR)):
+        with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+            xml = f.read()
+
+        expected = [expected_current(b, now) for b in legacy_parse(xml, now)]
+        assert expected == current_parse(xml, now), name
+
+        legacy = timeit.timeit(lambda: legacy_parse(xml, now), number=number)
+        current = timeit.timeit(lambda: current_parse(xml, now), number=number)
+        print(f"{name:24s} legacy {legacy / number * 1e6:8.1f}us  "
+              f"current {current / number * 1e6:8.1f}us  x{legacy / current:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+3d60f4f 이전 bus.py 의 파싱 / 표시 코드 (bench/bus_parser.py 의 비교 기준, 수정하지 말 것).
+datetime 은 bus_parser.py 가 고정 시각을 돌려주는 클래스로 바꿔서 사용.
+"""
+import re
+from datetime import datetime, timedelta  # noqa: F401 (bus_parser.py 에서 교체)
+
+import xmltodict
+
+from bus import crowd_map, kst  # noqa: F401
+
+
+def parse_item_list(response):
+    # 데이터가 없으면 None -> upstream 에서 backoff 후 재시도
+    data_dict = xmltodict.parse(response.text)
+    service_result = data_dict.get("ServiceResult") or {}
+    msg_body = service_result.get("msgBody") or {}
+    return msg_body.get("itemList") or None
+
+
+def process_item_list(item_list):
+    # itemList 가 여러 건이면 리스트로 옴 -> 첫 항목 사용
+    if isinstance(item_list, list):
+        item_list = item_list[0]
+
+    # JSON 반환용 리스트
+    buses = []
+    for i in range(1, 3):  # 1번, 2번 버스
+        bus_info = {
+            "arrival_time": item_list.get(f"arrmsg{i}", ""),
+            "bus_no": item_list.get(f"plainNo{i}", ""),
+            "crowd_code": item_list.get(f"rerdie_Div{i}", ""),
+            "crowd_level": item_list.get(f"reride_Num{i}", ""),
+        }
+        buses.append(format_bus_info_json(bus_info))
+
+    return buses
+
+
+def format_bus_info_json(bus):
+    arrival_msg = bus["arrival_time"]
+    bus_no = bus["bus_no"]
+    crowd_code = bus["crowd_code"]
+    crowd_level = bus["crowd_level"]
+
+    # 혼잡도 처리
+    crowd_str = ""
+    if crowd_code == "4":
+        crowd_str = crowd_map.get(crowd_level, "")
+
+    # 기본 초기값
+    position_str = None
+
+    # "12분22초 후[2번째 전]" 형태 분리
+    match_position = re.match(r"([\d분초\s]+).*?\[(.+)]", arrival_msg)
+    if match_position:
+        eta_raw = match_position.group(1).strip()  # "12분22초"
+        position_str = match_position.group(2).strip()  # "2번째 전"
+    else:
+        eta_raw = arrival_msg
+
+    # eta 계산
+    if eta_raw in ["출발대기"]:
+        eta_str = "출발 대기"
+        arrival_time = None
+    elif eta_raw in ["곧 도착"]:
+        eta_str = "곧 도착"
+        now = datetime.now(kst)
+        arrival_time = now.strftime("%p %I:%M").replace("AM", "오전").replace("PM", "오후")
+    else:
+        match = re.search(r"(\d+)분(\d+)초", eta_raw)
+        if match:
+            minutes = int(match.group(1))
+            seconds = int(match.group(2))
+            now = datetime.now(kst)
+            arrival_time_dt = now + timedelta(minutes=minutes, seconds=seconds)
+            eta_str = f"{minutes}분 {seconds}초"
+            arrival_time = arrival_time_dt.strftime("%p %I:%M").replace("AM", "오전").replace("PM", "오후")
+        else:
+            eta_str = eta_raw
+            now = datetime.now(kst)
+            arrival_time = now.strftime("%p %I:%M").replace("AM", "오전").replace("PM", "오후")
+
+    return {
+        "bus_no": bus_no,
+        "eta": eta_str,
+        "arrival_time": arrival_time,
+        "crowd": crowd_str,
+        "position": position_str
+    }
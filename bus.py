@@ -1,11 +1,15 @@
 import os
 from dotenv import load_dotenv
-import requests
-import xmltodict
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from datetime import datetime
 import re
-import pytz
 import time
+from typing import NamedTuple, Optional
+from xml.parsers import expat
+import pytz
+
+from shared_store import record_type
+from upstream import fetch_async, fetch_sync
 
 kst = pytz.timezone('Asia/Seoul')
 
@@ -19,95 +23,239 @@ crowd_map = {
     "5": "혼잡",
 }
 
-MAX_RETRY = 3  # 최대 재시도 횟수
-DELAY = 1      # 재시도 간 간격(초)
-
-
-def get_bus_arrival():
-    url = (f"http://ws.bus.go.kr/api/rest/arrive/getArrInfoByRoute?serviceKey={SERVICE_KEY}"
-           f"&stId=106000201&busRouteId=100100178&ord=25")
-
-    for attempt in range(MAX_RETRY):
-        response = requests.get(url, timeout=10)
-        if response.status_code != 200:
-            continue  # 실패하면 다음 시도
-        data_dict = xmltodict.parse(response.text)
-        service_result = data_dict.get("ServiceResult") or {}
-        msg_body = service_result.get("msgBody") or {}
-        item_list = msg_body.get("itemList")
-        if item_list:  # 데이터가 있으면 바로 반환
-            return process_item_list(item_list)
-        # 데이터가 없으면 잠시 대기 후 재시도
-        time.sleep(DELAY)
-    # MAX_RETRY 이후에도 데이터 없으면 빈 리스트 반환
-    return []
-
-
-def process_item_list(item_list):
-    # JSON 반환용 리스트
-    buses = []
-    for i in range(1, 3):  # 1번, 2번 버스
-        bus_info = {
-            "arrival_time": item_list.get(f"arrmsg{i}", ""),
-            "bus_no": item_list.get(f"plainNo{i}", ""),
-            "crowd_code": item_list.get(f"rerdie_Div{i}", ""),
-            "crowd_level": item_list.get(f"reride_Num{i}", ""),
-        }
-        buses.append(format_bus_info_json(bus_info))
-
-    return buses
-
-
-def format_bus_info_json(bus):
-    arrival_msg = bus["arrival_time"]
-    bus_no = bus["bus_no"]
-    crowd_code = bus["crowd_code"]
-    crowd_level = bus["crowd_level"]
-
-    # 혼잡도 처리
-    crowd_str = ""
-    if crowd_code == "4":
-        crowd_str = crowd_map.get(crowd_level, "")
-
-    # 기본 초기값
-    position_str = None
-
-    # "12분22초 후[2번째 전]" 형태 분리
-    match_position = re.match(r"([\d분초\s]+).*?\[(.+)]", arrival_msg)
+TIMEOUT = 10  # 요청 타임아웃(초)
+DEFAULT_TTL = 5  # 버스 캐시 기본 유지 시간(초)
+
+
+class BusTarget(NamedTuple):
+    st_id: str         # 정류소 ID
+    bus_route_id: str  # 노선 ID
+    ord: str           # 정류소 순번
+
+
+DEFAULT_TARGET = BusTarget("106000201", "100100178", "25")
+
+
+def parse_targets(value):
+    # "이름:stId:busRouteId:ord[:ttl],..." -> {이름: (BusTarget, ttl)}
+    targets = {"default": (DEFAULT_TARGET, DEFAULT_TTL)}
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        fields = [f.strip() for f in part.split(":")]
+        name, st_id, bus_route_id, ord_ = fields[:4]
+        ttl = int(fields[4]) if len(fields) > 4 else DEFAULT_TTL
+        targets[name] = (BusTarget(st_id, bus_route_id, ord_), ttl)
+    return targets
+
+
+# 조회 가능한 (정류소, 노선, 순번) 목록
+BUS_TARGETS = parse_targets(os.getenv("BUS_TARGETS", ""))
+
+
+def bus_cache_key(target=DEFAULT_TARGET):
+    return f"bus:{target.st_id}:{target.bus_route_id}:{target.ord}"
+
+
+def get_bus_url(target=DEFAULT_TARGET):
+    return (f"http://ws.bus.go.kr/api/rest/arrive/getArrInfoByRoute?serviceKey={SERVICE_KEY}"
+            f"&stId={target.st_id}&busRouteId={target.bus_route_id}&ord={target.ord}")
+
+
+class BusArrival(NamedTuple):
+    # 항목이 없으면 "", 비어 있으면 None (xmltodict 로 읽던 때와 같음)
+    arrival_msg: Optional[str]  # arrmsg (예: "12분22초후[2번째 전]")
+    bus_no: Optional[str]       # plainNo
+    crowd_code: Optional[str]   # rerdie_Div
+    crowd_level: Optional[str]  # reride_Num
+
+
+# itemList 에서 사용하는 항목 -> (버스 순번, BusArrival 필드 위치)
+ITEM_FIELDS = {
+    f"{tag}{i}": (i - 1, pos)
+    for i in (1, 2)
+    for pos, tag in enumerate(("arrmsg", "plainNo", "rerdie_Div", "reride_Num"))
+}
+
+
+ARRIVING_SOON = "곧 도착"
+WAITING = "출발 대기"
+
+
+@record_type
+@dataclass
+class BusSnapshot:
+    """버스 한 대의 조회 결과 (표시용 문자열은 format_bus_info_json 에서 생성)"""
+    __slots__ = ("bus_no", "observed_at", "eta_seconds", "arrival_epoch", "stops_remaining", "crowd_code", "status")
+    bus_no: str
+    observed_at: int                # 조회 시각 (epoch 초)
+    eta_seconds: Optional[int]      # 도착까지 남은 시간(초), 알 수 없으면 None
+    arrival_epoch: Optional[int]    # 예상 도착 시각 (epoch 초)
+    stops_remaining: Optional[int]  # 남은 정류장 수
+    crowd_code: Optional[str]       # 혼잡도 코드 (reride_Num, 혼잡도 제공 차량만)
+    status: Optional[str]           # 시간으로 표현되지 않는 상태 ("곧 도착", "출발 대기", "운행종료" 등)
+
+
+class _ItemListEnd(Exception):
+    pass
+
+
+def parse_arrivals(xml):
+    """
+    응답 XML 에서 첫 번째 itemList 의 필요한 항목만 읽어 [BusArrival, BusArrival] 반환.
+    expat 으로 순서대로 읽다가 itemList 가 끝나면 중단 (itemList 가 없으면 None).
+    """
+    values = [["", "", "", ""], ["", "", "", ""]]
+    state = {"found": False, "field": None}
+    text = []
+
+    def start(name, _attrs):
+        if name == "itemList":
+            state["found"] = True
+        elif state["found"]:
+            state["field"] = ITEM_FIELDS.get(name)
+            text.clear()
+
+    def chars(data):
+        if state["field"] is not None:
+            text.append(data)
+
+    def end(name):
+        field = state["field"]
+        if field is not None:
+            values[field[0]][field[1]] = "".join(text).strip() or None
+            state["field"] = None
+        elif name == "itemList":
+            raise _ItemListEnd
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.CharacterDataHandler = chars
+    parser.EndElementHandler = end
+    try:
+        parser.Parse(xml, True)
+    except _ItemListEnd:
+        pass
+
+    if not state["found"]:
+        return None
+    return [BusArrival(*v) for v in values]
+
+
+def parse_item_list(response):
+    # 데이터가 없으면 None -> upstream 에서 backoff 후 재시도
+    return parse_arrivals(response.content)
+
+
+def get_bus_arrival(target=DEFAULT_TARGET):
+    arrivals = fetch_sync(get_bus_url(target), parse_item_list, timeout=TIMEOUT)
+    # 재시도 이후에도 데이터 없으면 빈 리스트 반환
+    return process_item_list(arrivals) if arrivals else []
+
+
+async def get_bus_arrival_async(target=DEFAULT_TARGET):
+    arrivals = await fetch_async(get_bus_url(target), parse_item_list, timeout=TIMEOUT)
+    return process_item_list(arrivals) if arrivals else []
+
+
+def process_item_list(arrivals, observed_at=None):
+    # 1번, 2번 버스 조회 결과, 같은 응답의 버스는 같은 기준 시각 사용
+    observed_at = int(observed_at if observed_at is not None else time.time())
+    return [to_snapshot(arrival, observed_at) for arrival in arrivals]
+
+
+ETA_PATTERN = re.compile(r"(\d+)분\s*(?:(\d+)초)?")
+SECONDS_PATTERN = re.compile(r"^(\d+)초")
+STOPS_PATTERN = re.compile(r"(\d+)번째")
+ARRMSG_PATTERN = re.compile(r"([\d분초\s]+).*?\[(.+)]")  # "12분22초후[2번째 전]"
+
+
+def eta_to_seconds(eta):
+    # "12분 22초" -> 742, "곧 도착" -> 0, 그 외(출발 대기 등) -> None
+    if not eta:
+        return None
+    if eta == "곧 도착":
+        return 0
+    match = ETA_PATTERN.search(eta)
+    if match:
+        return int(match.group(1)) * 60 + int(match.group(2) or 0)
+    match = SECONDS_PATTERN.search(eta)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def position_to_stops(position):
+    # "2번째 전" -> 2
+    if not position:
+        return None
+    match = STOPS_PATTERN.search(position)
+    return int(match.group(1)) if match else None
+
+
+def format_clock(dt):
+    # "오전 07:05" 형식 (%p 는 로케일마다 달라서 직접 변환)
+    period = "오전" if dt.hour < 12 else "오후"
+    hour12 = dt.hour % 12 or 12
+    return f"{period} {hour12:02d}:{dt.minute:02d}"
+
+
+def to_snapshot(arrival: BusArrival, observed_at: int):
+    # "12분22초후[2번째 전]" -> eta 742초, 남은 정류장 2
+    stops = None
+    arrival_msg = arrival.arrival_msg or ""
+    match_position = ARRMSG_PATTERN.match(arrival_msg)
     if match_position:
-        eta_raw = match_position.group(1).strip()  # "12분22초"
-        position_str = match_position.group(2).strip()  # "2번째 전"
+        eta_raw = match_position.group(1).strip()
+        stops = position_to_stops(match_position.group(2))
     else:
         eta_raw = arrival_msg
 
-    # eta 계산
-    if eta_raw in ["출발대기"]:
-        eta_str = "출발 대기"
+    if eta_raw == "출발대기":
+        eta_seconds, status = None, WAITING
+    elif eta_raw == ARRIVING_SOON:
+        eta_seconds, status = 0, ARRIVING_SOON
+    else:
+        eta_seconds = eta_to_seconds(eta_raw)
+        status = eta_raw if eta_seconds is None else None
+
+    return BusSnapshot(
+        bus_no=arrival.bus_no,
+        observed_at=observed_at,
+        eta_seconds=eta_seconds,
+        arrival_epoch=observed_at + eta_seconds if eta_seconds is not None else None,
+        stops_remaining=stops,
+        crowd_code=arrival.crowd_level if arrival.crowd_code == "4" else None,
+        status=status,
+    )
+
+
+def format_bus_info_json(bus: BusSnapshot):
+    # 응답용 표시 문자열 (직렬화 시점에만 생성)
+    if bus.status is not None:
+        eta_str = bus.status
+    elif bus.eta_seconds < 60:
+        eta_str = f"{bus.eta_seconds}초"  # "45초후[1번째 전]" 은 이전처럼 초만 표시
+    elif bus.eta_seconds % 60 == 0:
+        eta_str = f"{bus.eta_seconds // 60}분"  # "5분후[3번째 전]" 도 이전처럼 분만 표시
+    else:
+        eta_str = f"{bus.eta_seconds // 60}분 {bus.eta_seconds % 60}초"
+
+    if bus.arrival_epoch is not None:
+        arrival_time = format_clock(datetime.fromtimestamp(bus.arrival_epoch, kst))
+    elif bus.status == WAITING:
         arrival_time = None
-    elif eta_raw in ["곧 도착"]:
-        eta_str = "곧 도착"
-        now = datetime.now(kst)
-        arrival_time = now.strftime("%p %I:%M").replace("AM", "오전").replace("PM", "오후")
     else:
-        match = re.search(r"(\d+)분(\d+)초", eta_raw)
-        if match:
-            minutes = int(match.group(1))
-            seconds = int(match.group(2))
-            now = datetime.now(kst)
-            arrival_time_dt = now + timedelta(minutes=minutes, seconds=seconds)
-            eta_str = f"{minutes}분 {seconds}초"
-            arrival_time = arrival_time_dt.strftime("%p %I:%M").replace("AM", "오전").replace("PM", "오후")
-        else:
-            eta_str = eta_raw
-            now = datetime.now(kst)
-            arrival_time = now.strftime("%p %I:%M").replace("AM", "오전").replace("PM", "오후")
+        arrival_time = format_clock(datetime.fromtimestamp(bus.observed_at, kst))
 
     return {
-        "bus_no": bus_no,
+        "bus_no": bus.bus_no,
         "eta": eta_str,
         "arrival_time": arrival_time,
-        "crowd": crowd_str,
-        "position": position_str
+        "crowd": crowd_map.get(bus.crowd_code, "") if bus.crowd_code is not None else "",
+        "position": f"{bus.stops_remaining}번째 전" if bus.stops_remaining is not None else None
     }
 
 
@@ -119,4 +267,4 @@ if __name__ == "__main__":
 
     # 각 버스 정보 format_bus_info_json 결과 출력
     for _bus in _buses:
-        print(json.dumps(_bus, ensure_ascii=False, indent=2))
+        print(json.dumps(format_bus_info_json(_bus), ensure_ascii=False, indent=2))
@@ -0,0 +1,318 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import pytz
+
+from record_bus import STORE_DIR, connect, partition_path, partition_paths
+
+logger = logging.getLogger("uvicorn.error")
+
+ANALYTICS_DB = os.path.join(STORE_DIR, "analytics.db")
+
+kst = pytz.timezone('Asia/Seoul')
+
+SLOT_SECONDS = 300        # ETA 분포 시간대 단위 (5분)
+ETA_BUCKET = 30           # ETA 분포 구간 (30초)
+ARRIVAL_BUCKET = 30       # 도착 시각 분포 구간 (30초)
+HEADWAY_BUCKET = 30       # 배차 간격 분포 구간 (30초)
+ARRIVAL_JUMP = 120        # 차량 번호가 없을 때 예상 도착 시각이 이만큼 늦어지면 다른 차량으로 판단
+OBSERVED_ETA = 120        # 마지막 샘플의 ETA 가 이 이하일 때만 실제 도착으로 인정
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS eta_hist (
+    weekday INTEGER NOT NULL,   -- 0: 월요일
+    slot INTEGER NOT NULL,      -- 하루 중 시간대 (초 // SLOT_SECONDS)
+    bucket INTEGER NOT NULL,    -- eta_seconds // ETA_BUCKET
+    count INTEGER NOT NULL,
+    PRIMARY KEY (weekday, slot, bucket)
+);
+CREATE TABLE IF NOT EXISTS arrival_hist (
+    weekday INTEGER NOT NULL,
+    seq INTEGER NOT NULL,       -- 그날 몇 번째로 도착한 버스인지
+    bucket INTEGER NOT NULL,    -- 하루 중 도착 시각(초) // ARRIVAL_BUCKET
+    count INTEGER NOT NULL,
+    PRIMARY KEY (weekday, seq, bucket)
+);
+CREATE TABLE IF NOT EXISTS headway_hist (
+    weekday INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,    -- 첫 번째/두 번째 버스 도착 간격 // HEADWAY_BUCKET
+    count INTEGER NOT NULL,
+    PRIMARY KEY (weekday, bucket)
+);
+CREATE TABLE IF NOT EXISTS watermark (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    processed_through TEXT NOT NULL  -- 집계가 끝난 마지막 날짜 (YYYY-MM-DD)
+);
+"""
+
+UPSERT_SQL = (
+    "INSERT INTO {table} ({columns}, count) VALUES ({placeholders}, ?) "
+    "ON CONFLICT ({columns}) DO UPDATE SET count = count + excluded.count"
+)
+
+_refresh_lock = threading.Lock()
+
+
+def connect_analytics():
+    os.makedirs(STORE_DIR, exist_ok=True)
+    conn = sqlite3.connect(ANALYTICS_DB)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def day_bounds(day):
+    start = kst.localize(datetime(day.year, day.month, day.day))
+    end = kst.localize(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+    return int(start.timestamp()), int(end.timestamp())
+
+
+def seconds_of_day(epoch):
+    dt = datetime.fromtimestamp(epoch, kst)
+    return dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+def first_recorded_day():
+    for path in partition_paths():
+        conn = connect(path)
+        try:
+            first = conn.execute("SELECT MIN(recorded_at) FROM bus_samples").fetchone()[0]
+        finally:
+            conn.close()
+        if first is not None:
+            return datetime.fromtimestamp(first, kst).date()
+    return None
+
+
+def load_day(day):
+    path = partition_path(day_bounds(day)[0])
+    if not os.path.exists(path):
+        return []
+    start, end = day_bounds(day)
+    conn = connect(path)
+    try:
+        return conn.execute(
+            "SELECT recorded_at, vehicle_rank, eta_seconds, arrival_at, plate_no FROM bus_samples "
+            "WHERE recorded_at >= ? AND recorded_at < ? ORDER BY recorded_at, vehicle_rank",
+            (start, end)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def observed_arrivals(samples):
+    # 첫 번째 버스 샘플을 차량별로 묶어서 마지막 예상 도착 시각을 실제 도착으로 사용
+    arrivals = []
+    current = None  # [plate, arrival_at, eta_seconds]
+    for _, rank, eta, arrival_at, plate in samples:
+        if rank != 1 or arrival_at is None:
+            continue
+        if current is not None:
+            same_vehicle = (plate == current[0]) if (plate and current[0]) else \
+                (arrival_at - current[1] <= ARRIVAL_JUMP)
+            if same_vehicle:
+                current[1], current[2] = arrival_at, eta
+                continue
+            arrivals.append(current)
+        current = [plate, arrival_at, eta]
+    if current is not None:
+        arrivals.append(current)
+    return [a[1] for a in arrivals if a[2] <= OBSERVED_ETA]
+
+
+def aggregate_day(day, samples):
+    weekday = day.weekday()
+    eta_counts, arrival_counts, headway_counts = {}, {}, {}
+
+    first_by_time = {}
+    for recorded_at, rank, eta, arrival_at, _ in samples:
+        if eta is None:
+            continue
+        if rank == 1:
+            key = (weekday, seconds_of_day(recorded_at) // SLOT_SECONDS, eta // ETA_BUCKET)
+            eta_counts[key] = eta_counts.get(key, 0) + 1
+            first_by_time[recorded_at] = arrival_at
+        elif rank == 2 and recorded_at in first_by_time:
+            headway = arrival_at - first_by_time[recorded_at]
+            if headway > 0:
+                key = (weekday, headway // HEADWAY_BUCKET)
+                headway_counts[key] = headway_counts.get(key, 0) + 1
+
+    for seq, arrival_at in enumerate(observed_arrivals(samples), start=1):
+        key = (weekday, seq, seconds_of_day(arrival_at) // ARRIVAL_BUCKET)
+        arrival_counts[key] = arrival_counts.get(key, 0) + 1
+
+    return eta_counts, arrival_counts, headway_counts
+
+
+def _upsert(conn, table, columns, counts):
+    if not counts:
+        return
+    sql = UPSERT_SQL.format(table=table, columns=", ".join(columns),
+                            placeholders=", ".join("?" * len(columns)))
+    conn.executemany(sql, [key + (count,) for key, count in counts.items()])
+
+
+def refresh(until=None):
+    """
+    watermark 다음 날부터 until 전날까지의 샘플만 읽어 집계 테이블에 더함.
+    하루 단위로 처리하므로 같은 날이 두 번 집계되지 않음 (until 기본값: 오늘).
+    """
+    until = until or datetime.now(kst).date()
+    with _refresh_lock:
+        conn = connect_analytics()
+        try:
+            row = conn.execute("SELECT processed_through FROM watermark WHERE id = 1").fetchone()
+            if row:
+                day = datetime.strptime(row[0], "%Y-%m-%d").date() + timedelta(days=1)
+            else:
+                day = first_recorded_day()
+                if day is None:
+                    return 0
+
+            processed = 0
+            while day < until:
+                eta_counts, arrival_counts, headway_counts = aggregate_day(day, load_day(day))
+                with conn:
+                    _upsert(conn, "eta_hist", ("weekday", "slot", "bucket"), eta_counts)
+                    _upsert(conn, "arrival_hist", ("weekday", "seq", "bucket"), arrival_counts)
+                    _upsert(conn, "headway_hist", ("weekday", "bucket"), headway_counts)
+                    conn.execute(
+                        "INSERT INTO watermark (id, processed_through) VALUES (1, ?) "
+                        "ON CONFLICT (id) DO UPDATE SET processed_through = excluded.processed_through",
+                        (day.isoformat(),)
+                    )
+                day += timedelta(days=1)
+                processed += 1
+            return processed
+        finally:
+            conn.close()
+
+
+def percentiles(hist, bucket_size, qs):
+    # hist: [(bucket, count)] 오름차순 -> 각 q 의 구간 중앙값
+    total = sum(c for _, c in hist)
+    if total == 0:
+        return {q: None for q in qs}
+    result = {}
+    for q in qs:
+        target = q * total
+        cumulative = 0
+        for bucket, count in hist:
+            cumulative += count
+            if cumulative >= target:
+                result[q] = bucket * bucket_size + bucket_size // 2
+                break
+    return result
+
+
+def _label(q):
+    return f"p{round(q * 100)}"
+
+
+def _query(sql, params):
+    conn = connect_analytics()
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _weekday_filter(weekday):
+    if weekday is None:
+        return "", ()
+    return " AND weekday = ?", (weekday,)
+
+
+def format_seconds_of_day(seconds):
+    if seconds is None:
+        return None
+    hour, minute = seconds // 3600, (seconds % 3600) // 60
+    period = "오전" if hour < 12 else "오후"
+    hour12 = 12 if hour % 12 == 0 else hour % 12
+    return f"{period} {hour12:02d}:{minute:02d}"
+
+
+def eta_distribution(weekday=None, qs=(0.5, 0.9)):
+    where, params = _weekday_filter(weekday)
+    rows = _query(
+        "SELECT slot, bucket, SUM(count) FROM eta_hist WHERE 1 = 1" + where +
+        " GROUP BY slot, bucket ORDER BY slot, bucket", params
+    )
+    slots = {}
+    for slot, bucket, count in rows:
+        slots.setdefault(slot, []).append((bucket, count))
+
+    return [
+        {
+            "time": format_seconds_of_day(slot * SLOT_SECONDS),
+            "samples": sum(c for _, c in hist),
+            "eta_seconds": {_label(q): v for q, v in percentiles(hist, ETA_BUCKET, qs).items()},
+        }
+        for slot, hist in sorted(slots.items())
+    ]
+
+
+def _arrival_hist(weekday, seq):
+    where, params = _weekday_filter(weekday)
+    return _query(
+        "SELECT bucket, SUM(count) FROM arrival_hist WHERE seq = ?" + where +
+        " GROUP BY bucket ORDER BY bucket", (seq,) + params
+    )
+
+
+def arrival_percentiles(weekday=None, seq=1, qs=(0.1, 0.5, 0.9)):
+    hist = _arrival_hist(weekday, seq)
+    values = percentiles(hist, ARRIVAL_BUCKET, qs)
+    return {
+        "samples": sum(c for _, c in hist),
+        "arrival": {_label(q): format_seconds_of_day(v) for q, v in values.items()},
+        "arrival_seconds": {_label(q): v for q, v in values.items()},
+    }
+
+
+def headway_percentiles(weekday=None, qs=(0.1, 0.5, 0.9)):
+    where, params = _weekday_filter(weekday)
+    hist = _query(
+        "SELECT bucket, SUM(count) FROM headway_hist WHERE 1 = 1" + where +
+        " GROUP BY bucket ORDER BY bucket", params
+    )
+    return {
+        "samples": sum(c for _, c in hist),
+        "headway_seconds": {_label(q): v for q, v in percentiles(hist, HEADWAY_BUCKET, qs).items()},
+    }
+
+
+def leave_by(weekday=None, seq=1, walk_minutes=5, confidence=0.9):
+    # confidence 확률로 버스를 타려면 도착 분포의 (1 - confidence) 지점까지 정류장에 있어야 함
+    hist = _arrival_hist(weekday, seq)
+    q = 1 - confidence
+    at_stop = percentiles(hist, ARRIVAL_BUCKET, (q,))[q]
+    if at_stop is None:
+        return {"samples": 0, "leave_by": None}
+    # 구간 중앙값 대신 구간 시작으로 보수적으로 계산
+    leave_at = at_stop - ARRIVAL_BUCKET // 2 - walk_minutes * 60
+    return {
+        "samples": sum(c for _, c in hist),
+        "confidence": confidence,
+        "walk_minutes": walk_minutes,
+        "be_at_stop_by": format_seconds_of_day(at_stop - ARRIVAL_BUCKET // 2),
+        "leave_by": format_seconds_of_day(leave_at),
+    }
+
+
+def refresh_after_recording():
+    # 기록 구간이 끝난 뒤 오늘 데이터까지 집계
+    try:
+        refresh(until=datetime.now(kst).date() + timedelta(days=1))
+    except Exception as e:
+        logger.error("버스 통계 집계 실패: %s", e)
+
+
+def refresh_pending():
+    try:
+        refresh()
+    except Exception as e:
+        logger.error("버스 통계 집계 실패: %s", e)
@@ -0,0 +1,236 @@
+import asyncio
+import threading
+import time
+import logging
+
+from metrics import CACHE_REQUESTS
+from shared_store import shared_store
+
+logger = logging.getLogger("uvicorn.error")
+
+ERROR_CACHE_EXPIRATION = 3  # 실패 결과 캐시 유지 시간(초)
+STORE_CHECK_INTERVAL = 1    # 키별 공유 저장소 확인 주기(초)
+
+
+class CacheEntry:
+    __slots__ = ("data", "timestamp", "error", "error_timestamp", "store_checked")
+
+    def __init__(self):
+        self.data = None
+        self.timestamp = None   # 마지막 성공 시각 (None 이면 값 없음)
+        self.error = None
+        self.error_timestamp = None
+        self.store_checked = None  # 마지막으로 공유 저장소를 확인한 시각
+
+
+class SingleFlightCache:
+    """
+    키별로 동시에 한 번만 fetch 하는 메모리 캐시.
+    - 만료된 값이 있으면 바로 돌려주고 백그라운드에서 한 번만 갱신 (stale-while-revalidate)
+    - 값이 없으면 첫 요청만 fetch 하고 나머지는 그 결과를 기다림
+    - fetch 실패는 error_expiration 동안 캐시해서 재시도 폭주를 막음
+    - store 를 주면 성공한 값을 공유 저장소에도 기록하고, 키별로 STORE_CHECK_INTERVAL 마다 저장소를 확인
+      (만료 전이라도 다른 워커 / 스케줄러 리더가 더 최근에 가져온 값을 그대로 사용)
+    - expiration 은 upstream 에서 다시 가져올 시점에만 사용
+    - 조회 결과(hit / stale / miss)는 name 과 키 앞부분("bus", "weather")별로 집계
+    """
+
+    def __init__(self, name, error_expiration=ERROR_CACHE_EXPIRATION, store=None):
+        self.name = name
+        self.error_expiration = error_expiration
+        self.store = store
+        self._entries = {}
+        self._locks = {}
+        self._refreshing = set()
+        self._inflight = {}  # 이벤트 루프에서 진행 중인 fetch task
+        self._guard = threading.Lock()
+
+    def _entry_and_lock(self, key):
+        with self._guard:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = CacheEntry()
+                self._locks[key] = threading.Lock()
+            return entry, self._locks[key]
+
+    def get(self, key, fetch_func, expiration):
+        entry, lock = self._entry_and_lock(key)
+        now = time.time()
+        self._load_shared(key, entry, now)
+
+        if entry.timestamp is not None:
+            if now - entry.timestamp >= expiration:
+                self._count(key, "stale")
+                self._refresh_in_background(key, fetch_func)
+            else:
+                self._count(key, "hit")
+            return entry.data
+
+        # 값이 없으면 한 요청만 fetch, 나머지는 락에서 대기
+        self._count(key, "miss")
+        with lock:
+            if entry.timestamp is not None:
+                return entry.data
+            self._raise_cached_error(entry, now)
+            return self._fetch(key, entry, fetch_func)
+
+    async def get_async(self, key, fetch_coro_func, expiration):
+        # get() 의 async 버전: 같은 키의 fetch 는 하나의 task 를 함께 기다림
+        entry, _ = self._entry_and_lock(key)
+        now = time.time()
+        self._load_shared(key, entry, now)
+
+        if entry.timestamp is not None:
+            if now - entry.timestamp < expiration:
+                self._count(key, "hit")
+            else:
+                self._count(key, "stale")
+                if not self._error_is_fresh(entry, now):
+                    self._start_task(key, entry, fetch_coro_func)
+            return entry.data
+
+        self._count(key, "miss")
+        self._raise_cached_error(entry, now)
+        task = self._start_task(key, entry, fetch_coro_func)
+        return await asyncio.shield(task)
+
+    def _start_task(self, key, entry, fetch_coro_func):
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run():
+            try:
+                data = await fetch_coro_func()
+            except Exception as e:
+                entry.error = e
+                entry.error_timestamp = time.time()
+                raise
+            self._store(key, entry, data)
+            return data
+
+        def done(t):
+            self._inflight.pop(key, None)
+            if not t.cancelled() and t.exception() is not None:
+                logger.error("캐시 갱신 실패 (%s): %s", key, t.exception())
+
+        task = self._inflight[key] = asyncio.ensure_future(run())
+        task.add_done_callback(done)
+        return task
+
+    def refresh(self, key, fetch_func):
+        # 스케줄러에서 호출: 동기로 한 번 갱신 (요청 경로의 fetch 와 겹치지 않음)
+        entry, lock = self._entry_and_lock(key)
+        with lock:
+            return self._fetch(key, entry, fetch_func)
+
+    def peek(self, key):
+        # fetch 없이 마지막으로 성공한 값 (없으면 None)
+        entry = self._entries.get(key)
+        return None if entry is None else entry.data
+
+    def discard(self, key):
+        # 더 이상 쓰지 않는 키 정리, 공유 저장소 포함 (진행 중인 fetch 는 그대로 끝남)
+        with self._guard:
+            self._entries.pop(key, None)
+            self._locks.pop(key, None)
+        if self.store is not None:
+            try:
+                self.store.delete(key)
+            except Exception as e:
+                logger.error("공유 캐시 삭제 실패 (%s): %s", key, e)
+
+    def prune(self, prefix, max_age):
+        # prefix 로 시작하고 max_age 초 동안 갱신되지 않은 키 정리 (공유 저장소 포함), 정리한 로컬 키 반환
+        cutoff = time.time() - max_age
+        with self._guard:
+            keys = [
+                k for k, e in self._entries.items()
+                if k.startswith(prefix) and k not in self._inflight
+                and (e.timestamp or e.error_timestamp or cutoff) < cutoff
+            ]
+            for k in keys:
+                del self._entries[k]
+                self._locks.pop(k, None)
+        if self.store is not None:
+            try:
+                self.store.prune(prefix, cutoff)
+            except Exception as e:
+                logger.error("공유 캐시 정리 실패 (%s): %s", prefix, e)
+        return keys
+
+    def age(self, key):
+        # 마지막 성공 이후 경과 시간(초), 값이 없으면 None
+        entry = self._entries.get(key)
+        if entry is None or entry.timestamp is None:
+            return None
+        return time.time() - entry.timestamp
+
+    def _count(self, key, result):
+        CACHE_REQUESTS.inc(cache=self.name, kind=key.split(":", 1)[0], result=result)
+
+    def _error_is_fresh(self, entry, now):
+        return entry.error is not None and now - entry.error_timestamp < self.error_expiration
+
+    def _raise_cached_error(self, entry, now):
+        if self._error_is_fresh(entry, now):
+            raise entry.error
+
+    def _fetch(self, key, entry, fetch_func):
+        try:
+            data = fetch_func()
+        except Exception as e:
+            entry.error = e
+            entry.error_timestamp = time.time()
+            raise
+        self._store(key, entry, data)
+        return data
+
+    def _store(self, key, entry, data):
+        entry.data = data
+        entry.timestamp = time.time()
+        entry.error = None
+        if self.store is not None:
+            try:
+                self.store.set(key, data, entry.timestamp)
+            except Exception as e:
+                logger.error("공유 캐시 저장 실패 (%s): %s", key, e)
+
+    def _load_shared(self, key, entry, now):
+        # 공유 저장소에 더 최근 값이 있으면 가져옴 (키별 STORE_CHECK_INTERVAL 에 한 번)
+        if self.store is None:
+            return
+        if entry.store_checked is not None and now - entry.store_checked < STORE_CHECK_INTERVAL:
+            return
+        entry.store_checked = now
+        try:
+            shared = self.store.get(key)
+        except Exception as e:
+            logger.error("공유 캐시 조회 실패 (%s): %s", key, e)
+            return
+        if shared is not None and (entry.timestamp is None or shared[1] > entry.timestamp):
+            entry.data, entry.timestamp = shared
+
+    def _refresh_in_background(self, key, fetch_func):
+        entry, lock = self._entry_and_lock(key)
+        with self._guard:
+            if key in self._refreshing or self._error_is_fresh(entry, time.time()):
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                with lock:
+                    self._fetch(key, entry, fetch_func)
+            except Exception as e:
+                logger.error("캐시 갱신 실패 (%s): %s", key, e)
+            finally:
+                with self._guard:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"cache-refresh-{key}", daemon=True).start()
+
+
+# 버스/날씨 upstream 응답 공용 캐시 (/api/info, /api/bus 가 함께 사용)
+# 여러 워커로 실행하면 공유 저장소를 통해 한 워커가 가져온 값을 함께 사용
+upstream_cache = SingleFlightCache("upstream", store=shared_store)
@@ -0,0 +1,169 @@
+import os
+import zlib
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli 가 없으면 gzip 만 사용
+    brotli = None
+
+load_dotenv()
+
+# 응답 압축 설정
+# - COMPRESSION: 사용할 인코딩 (선호 순서, 쉼표 구분), "off" 면 압축하지 않음
+# - COMPRESSION_MIN_SIZE: 이보다 작은 응답은 그대로 전송 (bytes)
+COMPRESSION = os.getenv("COMPRESSION", "br,gzip")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+EXCLUDED_CONTENT_TYPES = ("text/event-stream",)  # SSE 는 이벤트 단위로 바로 전송되어야 함
+
+
+class GzipCompressor:
+    def __init__(self):
+        self._z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # gzip 헤더 (mtime 0)
+
+    def compress(self, data, flush=False):
+        out = self._z.compress(data)
+        return out + self._z.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        return self._z.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self._b = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data, flush=False):
+        out = self._b.process(data)
+        return out + self._b.flush() if flush else out
+
+    def finish(self):
+        return self._b.finish()
+
+
+COMPRESSORS = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+
+ENCODINGS = tuple(c.strip() for c in COMPRESSION.split(",") if c.strip() in COMPRESSORS)
+
+
+def compress_body(coding, body):
+    compressor = COMPRESSORS[coding]()
+    return compressor.compress(body) + compressor.finish()
+
+
+def negotiate(accept_encoding, encodings=ENCODINGS):
+    # Accept-Encoding 에서 q 값이 가장 높은 인코딩 (같으면 encodings 순서), 없으면 None
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in encodings:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    응답 본문 압축 (gzip / brotli).
+    - 작은 응답, SSE, 이미 Content-Encoding 이 있는 응답(미리 압축한 /api/info 등)은 그대로 전송
+    - 스트리밍 응답은 chunk 마다 flush 하면서 압축
+    - 압축하면 ETag 를 weak 로 바꿈 (인코딩마다 바이트가 다르므로)
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE, encodings=ENCODINGS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings
+
+    async def __call__(self, scope, receive, send):
+        coding = None
+        if scope["type"] == "http" and self.encodings:
+            coding = negotiate(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingResponder(self.app, coding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressingResponder:
+    def __init__(self, app, coding, minimum_size):
+        self.app = app
+        self.coding = coding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.compressor = None
+        self.started = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _should_compress(self, headers, body, more_body):
+        if "content-encoding" in headers:
+            return False
+        if headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES):
+            return False
+        return more_body or len(body) >= self.minimum_size
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            # 첫 본문을 보고 압축 여부를 정한 뒤 헤더와 함께 전송
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if self._should_compress(headers, body, more_body):
+                self.compressor = COMPRESSORS[self.coding]()
+                headers["Content-Encoding"] = self.coding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if more_body:
+                    if "content-length" in headers:
+                        del headers["content-length"]
+                    body = self.compressor.compress(body, flush=True)
+                else:
+                    body = self.compressor.compress(body) + self.compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                message = {**message, "body": body}
+            await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        if self.compressor is not None:
+            body = self.compressor.compress(body, flush=more_body)
+            if not more_body:
+                body += self.compressor.finish()
+            message = {**message, "body": body}
+        await self.send(message)
@@ -4,3 +4,7 @@ from .employees import (create_employee, get_employees, update_employee,
 from .dayoffs import (upsert_employee_month_dayoffs, get_dayoffs_by_month,
                       get_employee_dayoffs_by_month, get_work_intersection)
 from .positions import get_employee_positions_by_month, upsert_employee_month_positions, get_positions_by_month
+from .roster_cache import roster_cache
+from .availability import all_working_days, at_least_k_working_days
+from .roster import import_roster_month, export_roster_month
+from . import aio
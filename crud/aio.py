@@ -0,0 +1,80 @@
+# async 라우터용 crud
+# 기존 crud 함수를 AsyncSession.run_sync 로 실행 -> DB I/O 동안 이벤트 루프/스레드풀을 막지 않음
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import employees, dayoffs, positions, roster, availability
+
+
+async def create_employee(db: AsyncSession, employee):
+    return await db.run_sync(employees.create_employee, employee)
+
+
+async def get_employees(db: AsyncSession):
+    return await db.run_sync(employees.get_employees)
+
+
+async def get_names(db: AsyncSession):
+    return await db.run_sync(employees.get_names)
+
+
+async def get_employee(db: AsyncSession, employee_id: int):
+    return await db.run_sync(employees.get_employee, employee_id)
+
+
+async def update_employee(db: AsyncSession, employee_id: int, employee_update):
+    return await db.run_sync(employees.update_employee, employee_id, employee_update)
+
+
+async def get_employee_schedules(db: AsyncSession, date_str: str):
+    return await db.run_sync(employees.get_employee_schedules, date_str)
+
+
+async def change_employee_order(db: AsyncSession, new_order):
+    return await db.run_sync(employees.change_employee_order, new_order)
+
+
+async def get_employee_order(db: AsyncSession):
+    return await db.run_sync(employees.get_employee_order)
+
+
+async def get_employee_dayoffs_by_month(db: AsyncSession, year: int, month: int, employee_id: int):
+    return await db.run_sync(dayoffs.get_employee_dayoffs_by_month, year, month, employee_id)
+
+
+async def upsert_employee_month_dayoffs(db: AsyncSession, employee_id: int, dates: list, year: int, month: int):
+    return await db.run_sync(dayoffs.upsert_employee_month_dayoffs, employee_id, dates, year, month)
+
+
+async def get_dayoffs_by_month(db: AsyncSession, year: int, month: int):
+    return await db.run_sync(dayoffs.get_dayoffs_by_month, year, month)
+
+
+async def get_work_intersection(db: AsyncSession, year: int, month: int, names):
+    return await db.run_sync(dayoffs.get_work_intersection, year, month, names)
+
+
+async def all_working_days(db: AsyncSession, names, start, end):
+    return await db.run_sync(availability.all_working_days, names, start, end)
+
+
+async def at_least_k_working_days(db: AsyncSession, names, start, end, k: int):
+    return await db.run_sync(availability.at_least_k_working_days, names, start, end, k)
+
+
+async def get_employee_positions_by_month(db: AsyncSession, year: int, month: int, employee_id: int):
+    return await db.run_sync(positions.get_employee_positions_by_month, year, month, employee_id)
+
+
+async def upsert_employee_month_positions(db: AsyncSession, employee_id: int, year: int, month: int, month_positions):
+    return await db.run_sync(positions.upsert_employee_month_positions, employee_id, year, month, month_positions)
+
+
+async def get_positions_by_month(db: AsyncSession, year: int, month: int):
+    return await db.run_sync(positions.get_positions_by_month, year, month)
+
+
+async def import_roster_month(db: AsyncSession, year: int, month: int, employees_roster):
+    return await db.run_sync(roster.import_roster_month, year, month, employees_roster)
+
+
+async def export_roster_month(db: AsyncSession, year: int, month: int):
+    return await db.run_sync(roster.export_roster_month, year, month)
@@ -0,0 +1,164 @@
+import threading
+from datetime import date
+from typing import List
+
+from sqlalchemy.orm import Session
+import models
+from .versions import SharedVersion
+
+ALWAYS_INCLUDED = "유루디아"  # 근무 교집합 조회 시 항상 포함
+MIN_DATE = date(2000, 1, 1)  # 조회할 수 있는 가장 이른 날짜 (비트 0, 이전 휴무는 마스크에 없음)
+BASE_ORDINAL = MIN_DATE.toordinal()
+
+
+def day_bit(day: date):
+    return day.toordinal() - BASE_ORDINAL
+
+
+class AvailabilityIndex:
+    """
+    직원별 휴무일을 하나의 int 비트마스크로 보관 (bit i = BASE 로부터 i 일째 휴무).
+    기간 조회는 범위 마스크와 AND / popcount 로 계산.
+    직원의 휴무가 바뀌면 해당 직원 마스크만 다시 읽음 (다른 워커가 바꾸면 전체를 다시 읽음).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._masks = {}        # employee_id -> 휴무 비트마스크
+        self._generations = {}  # employee_id -> int
+        self._epoch = 0         # 전체 무효화 마다 증가
+        self._shared = SharedVersion("availability_index")
+
+    def _generation(self, employee_id):
+        return self._epoch, self._generations.get(employee_id, 0)
+
+    def _clear(self):
+        self._epoch += 1
+        self._masks.clear()
+
+    def bump(self, db):
+        # 데이터 변경과 같은 트랜잭션에서 공유 카운터 증가 (commit 전에 호출), 새 값은 invalidate 에 전달
+        return self._shared.bump(db)
+
+    def invalidate(self, employee_id=None, version=None):
+        if employee_id is None:
+            with self._lock:
+                self._clear()
+            if version is not None:
+                self._shared.follow(version)
+        else:
+            self.invalidate_many([employee_id], version)
+
+    def invalidate_many(self, employee_ids, version=None):
+        # 여러 직원을 한 번에 무효화 (version: bump() 가 돌려준 값, 없으면 이 프로세스만)
+        with self._lock:
+            for employee_id in employee_ids:
+                self._generations[employee_id] = self._generations.get(employee_id, 0) + 1
+                self._masks.pop(employee_id, None)
+        if version is not None:
+            self._shared.follow(version)
+
+    def dayoff_masks(self, db: Session, employee_ids):
+        if self._shared.changed():
+            with self._lock:
+                self._clear()
+
+        with self._lock:
+            masks = {e_id: self._masks[e_id] for e_id in employee_ids if e_id in self._masks}
+            missing = [e_id for e_id in employee_ids if e_id not in masks]
+            generations = {e_id: self._generation(e_id) for e_id in missing}
+
+        if missing:
+            loaded = {e_id: 0 for e_id in missing}
+            rows = (
+                db.query(models.DayOff.employee_id, models.DayOff.date)
+                .filter(models.DayOff.employee_id.in_(missing))
+                .all()
+            )
+            for e_id, off_date in rows:
+                if day_bit(off_date) >= 0:
+                    loaded[e_id] |= 1 << day_bit(off_date)
+
+            with self._lock:
+                for e_id, mask in loaded.items():
+                    # 읽는 동안 바뀐 직원은 저장하지 않음
+                    if self._generation(e_id) == generations[e_id]:
+                        self._masks[e_id] = mask
+            masks.update(loaded)
+
+        return masks
+
+
+availability_index = AvailabilityIndex()
+
+
+def range_mask(start: date, end: date):
+    # [start, end] 모든 날의 비트
+    return ((1 << (end.toordinal() - start.toordinal() + 1)) - 1) << day_bit(start)
+
+
+def mask_to_dates(mask: int):
+    dates = []
+    while mask:
+        low = mask & -mask
+        dates.append(date.fromordinal(BASE_ORDINAL + low.bit_length() - 1))
+        mask ^= low
+    return dates
+
+
+def add_to_counter(planes, mask):
+    # 날짜별 인원 수를 비트 평면(LSB 부터)으로 누적하는 병렬 덧셈
+    carry = mask
+    for i, plane in enumerate(planes):
+        planes[i], carry = plane ^ carry, plane & carry
+        if not carry:
+            return
+    planes.append(carry)
+
+
+def at_least_mask(planes, k, full):
+    # 인원 수 >= k 인 날의 마스크 (비트 평면 비교)
+    greater, equal = 0, full
+    for i in range(max(len(planes), k.bit_length()) - 1, -1, -1):
+        plane = planes[i] if i < len(planes) else 0
+        if (k >> i) & 1:
+            equal &= plane
+        else:
+            greater |= equal & plane
+            equal &= ~plane
+    return greater | equal
+
+
+def count_at(planes, bit):
+    return sum(((plane >> bit) & 1) << i for i, plane in enumerate(planes))
+
+
+def resolve_employee_ids(db: Session, names: List[str]):
+    rows = db.query(models.Employee.id, models.Employee.name).filter(models.Employee.name.in_(names)).all()
+    return [e_id for e_id, _ in rows]
+
+
+def work_masks(db: Session, names: List[str], start: date, end: date):
+    # 직원별 근무일 마스크 (기간 내, 휴무가 아닌 날)
+    full = range_mask(start, end)
+    employee_ids = resolve_employee_ids(db, names)
+    masks = availability_index.dayoff_masks(db, employee_ids)
+    return full, [full & ~masks[e_id] for e_id in employee_ids]
+
+
+def all_working_days(db: Session, names: List[str], start: date, end: date):
+    # 모두 근무하는 날 (AND)
+    result, masks = work_masks(db, names, start, end)
+    for mask in masks:
+        result &= mask
+    return [d.isoformat() for d in mask_to_dates(result)]
+
+
+def at_least_k_working_days(db: Session, names: List[str], start: date, end: date, k: int):
+    # k 명 이상 근무하는 날과 그날 근무 인원
+    full, masks = work_masks(db, names, start, end)
+    planes = []
+    for mask in masks:
+        add_to_counter(planes, mask)
+    result = at_least_mask(planes, k, full)
+    return [{"date": d.isoformat(), "count": count_at(planes, day_bit(d))} for d in mask_to_dates(result)]
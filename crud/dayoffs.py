@@ -1,18 +1,20 @@
-from collections import defaultdict
 from typing import List
 
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 import models
-import calendar
-from datetime import date, timedelta
+from datetime import timedelta
+from .utils import month_range, upsert_insert
+from .roster_cache import roster_cache
+from .availability import availability_index, all_working_days, ALWAYS_INCLUDED
 
 
 def get_employee_dayoffs_by_month(db: Session, year: int, month: int, employee_id: int):
+    start, end = month_range(year, month)
     dayoffs = db.query(models.DayOff).filter(
         models.DayOff.employee_id == employee_id,
-        func.strftime("%Y", models.DayOff.date) == str(year),
-        func.strftime("%m", models.DayOff.date) == f"{month:02d}"
+        models.DayOff.date >= start,
+        models.DayOff.date < end
     ).order_by(models.DayOff.order).all()
 
     dates = [d.date.isoformat() for d in dayoffs]
@@ -26,38 +28,49 @@ def get_employee_dayoffs_by_month(db: Session, year: int, month: int, employee_i
 
 
 def upsert_employee_month_dayoffs(db: Session, employee_id: int, dates: list, year: int, month: int):
-    # 기존 데이터 조회
-    existing = db.query(models.DayOff).filter(
-        models.DayOff.employee_id == employee_id,
-        func.strftime("%Y", models.DayOff.date) == str(year),
-        func.strftime("%m", models.DayOff.date) == f"{month:02d}"
-    ).all()
-
-    existing_map = {d.date.isoformat(): d for d in existing}
-
-    for day_date, dayoff_obj in existing_map.items():
-        if day_date not in dates:
-            db.delete(dayoff_obj)
-
-    # 날짜 정렬 후 순서(order) 부여
-    sorted_dates = sorted(dates)
-    for idx, day_date in enumerate(sorted_dates, start=1):
-        if day_date in existing_map:
-            # update
-            existing_map[day_date].order = idx
-        else:
-            # create
-            new_dayoff = models.DayOff(
-                employee_id=employee_id,
-                date=day_date,
-                order=idx
-            )
-            db.add(new_dayoff)
+    start, end = month_range(year, month)
+
+    sorted_dates = sorted(set(dates))
 
+    # 새 입력에 없는 날짜는 한 번에 삭제
+    db.execute(
+        delete(models.DayOff).where(
+            models.DayOff.employee_id == employee_id,
+            models.DayOff.date >= start,
+            models.DayOff.date < end,
+            models.DayOff.date.notin_(sorted_dates)
+        )
+    )
+
+    # 날짜 정렬 후 순서(order) 부여, (employee_id, date) 충돌 시 순서가 바뀐 행만 update
+    if sorted_dates:
+        stmt = upsert_insert(db, models.DayOff).values([
+            {"employee_id": employee_id, "date": day_date, "order": idx}
+            for idx, day_date in enumerate(sorted_dates, start=1)
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[models.DayOff.employee_id, models.DayOff.date],
+            set_={"order": stmt.excluded.order},
+            where=models.DayOff.order != stmt.excluded.order
+        ))
+
+    # 공유 버전은 데이터와 함께 commit
+    roster_version = roster_cache.bump(db)
+    availability_version = availability_index.bump(db)
     db.commit()
 
+    # 근무표 스냅샷 / 근무 가능일 마스크 무효화
+    for y, m in {(year, month)} | {(d.year, d.month) for d in dates}:
+        roster_cache.invalidate_month(y, m, all_schedules=True, version=roster_version)
+    availability_index.invalidate(employee_id, version=availability_version)
+
 
 def get_dayoffs_by_month(db: Session, year: int, month: int):
+    return roster_cache.get(year, month, "dayoffs", lambda: load_dayoffs_by_month(db, year, month))
+
+
+def load_dayoffs_by_month(db: Session, year: int, month: int):
+    start, end = month_range(year, month)
     results = (
         db.query(
             models.DayOff.employee_id,
@@ -68,8 +81,8 @@ def get_dayoffs_by_month(db: Session, year: int, month: int):
         )
         .join(models.Employee, models.Employee.id == models.DayOff.employee_id)  # type: ignore
         .filter(
-            func.strftime("%Y", models.DayOff.date) == str(year),
-            func.strftime("%m", models.DayOff.date) == f"{month:02d}"
+            models.DayOff.date >= start,
+            models.DayOff.date < end
         )
         .order_by(models.DayOff.order)
         .all()
@@ -90,32 +103,9 @@ def get_dayoffs_by_month(db: Session, year: int, month: int):
 
 
 def get_work_intersection(db: Session, year: int, month: int, names: List[str]):
-    # 해당 연월의 전체 날짜
-    num_days = calendar.monthrange(year, month)[1]
-    workdays = {date(year, month, day) for day in range(1, num_days + 1)}
-
-    # 이름 리스트에 유루디아 추가
-    names.append("유루디아")
-
-    # list 의 사람들의 휴일 조회
-    dayoffs = (
-        db.query(models.Employee.name, models.DayOff.date)
-        .join(models.DayOff, models.Employee.id == models.DayOff.employee_id)  # type:ignore
-        .filter(models.Employee.name.in_(names))
-        .filter(
-            func.strftime("%Y", models.DayOff.date) == str(year),
-            func.strftime("%m", models.DayOff.date) == f"{month:02d}")
-        .all()
-    )
-
-    # 직원들별 set 생성
-    dayoff_map = defaultdict(set)
-    for name, off_date in dayoffs:
-        dayoff_map[name].add(off_date)
-
-    # 전체 날짜에서 직원들의 근무일 제외
-    for n in names:
-        workdays -= dayoff_map.get(n, set())
+    start, end = month_range(year, month)
 
-    return {"dates": [d.isoformat() for d in sorted(workdays)]}
+    # 유루디아는 항상 포함 (요청 리스트는 수정하지 않음)
+    names = list(names) + [ALWAYS_INCLUDED]
 
+    return {"dates": all_working_days(db, names, start, end - timedelta(days=1))}
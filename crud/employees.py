@@ -1,9 +1,10 @@
 from datetime import datetime
 from fastapi import HTTPException
-from sqlalchemy import func
+from sqlalchemy import func, and_
 from sqlalchemy.orm import Session
 import models
 import schemas
+from .roster_cache import roster_cache
 
 
 def create_employee(db: Session, employee: schemas.EmployeeCreateAndUpdate):
@@ -12,7 +13,9 @@ def create_employee(db: Session, employee: schemas.EmployeeCreateAndUpdate):
     db_employee = models.Employee(**employee.dict())
     db_employee.order = max_order + 1
     db.add(db_employee)
+    version = roster_cache.bump(db)
     db.commit()
+    roster_cache.invalidate_all(version)
 
 
 def get_employees(db: Session):
@@ -36,67 +39,80 @@ def update_employee(db: Session, employee_id: int, employee_update: schemas.Empl
     for key, value in employee_update.dict().items():
         setattr(db_employee, key, value)
 
+    version = roster_cache.bump(db)
     db.commit()
+    roster_cache.invalidate_all(version)
     db.refresh(db_employee)
     return db_employee
 
 
 def get_employee_schedules(db: Session, date_str: str):
-    employees = get_employees(db)
-
     query_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-    dayoffs = db.query(models.DayOff).filter(models.DayOff.date == query_date).all()
-
-    # 휴무인 사람들의 id
-    dayoff_ids = [d.employee_id for d in dayoffs]
-
-    # 휴무가 아닌 사람들의 이름
-    names = [e.name for e in employees if e.id not in dayoff_ids]
+    return roster_cache.get(query_date.year, query_date.month, "schedules",
+                            lambda: load_employee_schedules(db, date_str, query_date), sub_key=date_str)
+
+
+def load_employee_schedules(db: Session, date_str: str, query_date):
+
+    # 직원 + 당일 휴무 여부 + 당일 특별 포지션을 한 번에 조회
+    rows = (
+        db.query(models.Employee, models.DayOff.id.label("dayoff_id"),
+                 models.SpecialPosition.id.label("sp_id"), models.SpecialPosition.position)
+        .outerjoin(models.DayOff, and_(models.DayOff.employee_id == models.Employee.id,
+                                       models.DayOff.date == query_date))
+        .outerjoin(models.SpecialPosition, and_(models.SpecialPosition.employee_id == models.Employee.id,
+                                                models.SpecialPosition.date == query_date))
+        .order_by(models.Employee.order)
+        .all()
+    )
+
+    employees = {}     # id -> 직원 (직원 순서 유지)
+    off_ids = set()    # 휴무인 사람들의 id
+    sp_dict = {}       # id -> (sp_id, 포지션), 같은 날 여러 건이면 마지막 것
+    partner_sp = None  # (sp_id, 이름), 시야기 중 가장 먼저 등록된 것
+    for e, dayoff_id, sp_id, position in rows:
+        employees[e.id] = e
+        if dayoff_id is not None:
+            off_ids.add(e.id)
+        if sp_id is not None:
+            if e.id not in sp_dict or sp_id > sp_dict[e.id][0]:
+                sp_dict[e.id] = (sp_id, position)
+            if position == "시야기" and (partner_sp is None or sp_id < partner_sp[0]):
+                partner_sp = (sp_id, e.name)
+
+    # 휴무가 아닌 사람들의 id
+    working_ids = {e_id for e_id in employees if e_id not in off_ids}
 
     # 파트별 분리
     parts = ["샌드위치", "오븐", "반죽", "빵", "시야기", "케이크"]
     part_dicts = {p: [] for p in parts}
 
-    special_positions = db.query(models.SpecialPosition).filter(models.SpecialPosition.date == query_date).all()
-
-    sp_dict = {sp.employee_id: sp.position for sp in special_positions}
-
-    for e in employees:
-        if e.name in names:
-            part_name = sp_dict.get(e.id, e.default_position)
+    for e in employees.values():
+        if e.id in working_ids:
+            part_name = sp_dict[e.id][1] if e.id in sp_dict else e.default_position
             part_dicts[part_name].append(e.name)
 
     employee_part = [{"part_name": p, "employees": part_dicts[p]} for p in parts]
 
     # 파트너
-    partner_obj = (db.query(models.SpecialPosition)
-                   .filter(models.SpecialPosition.date == query_date)
-                   .filter(models.SpecialPosition.position == "시야기")
-                   .first())
-
-    partner = "김지윤"  # 기본값
-    if partner_obj:
-        match = next((n.name for n in employees if n.id == partner_obj.employee_id), None)
-        if match:
-            partner = match
+    partner = partner_sp[1] if partner_sp else "김지윤"  # 기본값
 
     # 남은 휴일
-    yurudia = db.query(models.Employee).filter(models.Employee.name == "유루디아").first()
+    yurudia = next((e for e in employees.values() if e.name == "유루디아"), None)
 
     if yurudia:
-        next_dayoff = (
-            db.query(models.DayOff)
+        next_dayoff_date = (
+            db.query(func.min(models.DayOff.date))
             .filter(models.DayOff.employee_id == yurudia.id)  # type:ignore
             .filter(models.DayOff.date > query_date)
-            .order_by(models.DayOff.date.asc())
-            .first()
+            .scalar()
         )
 
-        if next_dayoff:
-            days_left = (next_dayoff.date - query_date).days
+        if next_dayoff_date:
+            days_left = (next_dayoff_date - query_date).days
             days_left_str = f"{days_left}일 남음"
 
-            if "유루디아" not in names:
+            if yurudia.id not in working_ids:
                 days_left_str = "휴일"
         else:
             days_left_str = "남은 휴일이 없습니다."
@@ -106,7 +122,7 @@ def get_employee_schedules(db: Session, date_str: str):
 
     return {
         "date": date_str,
-        "total": len(names),
+        "total": len(working_ids),
         "employee_part": employee_part,
         "partner": partner,
         "next_dayoff": days_left_str
@@ -131,7 +147,9 @@ def change_employee_order(db: Session, new_order: schemas.EmployeeOrderRequest):
     for e in employees:
         e.order = new_order_dict[e.name]
 
+    version = roster_cache.bump(db)
     db.commit()
+    roster_cache.invalidate_all(version)
 
     return get_employee_response(employees)
 
@@ -1,16 +1,19 @@
 import models
 from typing import List
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from schemas import Positions
 from datetime import date
+from .utils import month_range, upsert_insert
+from .roster_cache import roster_cache
 
 
 def get_employee_positions_by_month(db: Session, year: int, month: int, employee_id: int):
+    start, end = month_range(year, month)
     positions = db.query(models.SpecialPosition).filter(
         models.SpecialPosition.employee_id == employee_id,
-        func.strftime("%Y", models.SpecialPosition.date) == str(year),
-        func.strftime("%m", models.SpecialPosition.date) == f"{month:02d}"
+        models.SpecialPosition.date >= start,
+        models.SpecialPosition.date < end
     ).order_by(models.SpecialPosition.date).all()
 
     data = [
@@ -30,39 +33,47 @@ def get_employee_positions_by_month(db: Session, year: int, month: int, employee
 
 
 def upsert_employee_month_positions(db: Session, employee_id: int, year: int, month: int, positions: List[Positions]):
-    # 기존 데이터 조회
-    existing = db.query(models.SpecialPosition).filter(
-        models.SpecialPosition.employee_id == employee_id,
-        func.strftime("%Y", models.SpecialPosition.date) == str(year),
-        func.strftime("%m", models.SpecialPosition.date) == f"{month:02d}"
-    ).all()
-
-    existing_map = {d.date.isoformat(): d for d in existing}
-    position_map = {p.date: p.position for p in positions}
-
-    # 기존에 있었는데 새로운 입력에는 없는 경우 삭제
-    for day_date, positions_obj in existing_map.items():
-        if day_date not in position_map:
-            db.delete(positions_obj)
-
-    # 새로 들어온 날짜들 순회
-    for day_date in sorted(position_map.keys()):
-        if day_date in existing_map:
-            # update
-            existing_map[day_date].position = position_map[day_date]
-        else:
-            # create
-            new_position = models.SpecialPosition(
-                employee_id=employee_id,
-                date=date.fromisoformat(day_date),
-                position=position_map[day_date]
-            )
-            db.add(new_position)
+    start, end = month_range(year, month)
+
+    position_map = {date.fromisoformat(p.date): p.position for p in positions}
+
+    # 새 입력에 없는 날짜는 한 번에 삭제
+    db.execute(
+        delete(models.SpecialPosition).where(
+            models.SpecialPosition.employee_id == employee_id,
+            models.SpecialPosition.date >= start,
+            models.SpecialPosition.date < end,
+            models.SpecialPosition.date.notin_(list(position_map))
+        )
+    )
 
+    # (employee_id, date) 충돌 시 포지션이 바뀐 행만 update
+    if position_map:
+        stmt = upsert_insert(db, models.SpecialPosition).values([
+            {"employee_id": employee_id, "date": day_date, "position": position}
+            for day_date, position in sorted(position_map.items())
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[models.SpecialPosition.employee_id, models.SpecialPosition.date],
+            set_={"position": stmt.excluded.position},
+            where=models.SpecialPosition.position != stmt.excluded.position
+        ))
+
+    # 공유 버전은 데이터와 함께 commit
+    roster_version = roster_cache.bump(db)
     db.commit()
 
+    # 근무표 스냅샷 무효화
+    for y, m in {(year, month)} | {(d.year, d.month) for d in position_map}:
+        roster_cache.invalidate_month(y, m, version=roster_version)
+
 
 def get_positions_by_month(db: Session, year: int, month: int):
+    return roster_cache.get(year, month, "positions", lambda: load_positions_by_month(db, year, month))
+
+
+def load_positions_by_month(db: Session, year: int, month: int):
+    start, end = month_range(year, month)
     results = (
         db.query(
             models.SpecialPosition.employee_id,
@@ -73,8 +84,8 @@ def get_positions_by_month(db: Session, year: int, month: int):
         )
         .join(models.Employee, models.Employee.id == models.SpecialPosition.employee_id)  # type: ignore
         .filter(
-            func.strftime("%Y", models.SpecialPosition.date) == str(year),
-            func.strftime("%m", models.SpecialPosition.date) == f"{month:02d}"
+            models.SpecialPosition.date >= start,
+            models.SpecialPosition.date < end
         )
         .order_by(models.SpecialPosition.date)
         .all()
@@ -0,0 +1,149 @@
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+import models
+import schemas
+from .utils import month_range
+from .roster_cache import roster_cache
+from .availability import availability_index
+
+
+def _validate(db: Session, year: int, month: int, roster: List[schemas.RosterEmployee]):
+    start, end = month_range(year, month)
+
+    employee_ids = [e.employee_id for e in roster]
+    if len(set(employee_ids)) != len(employee_ids):
+        raise HTTPException(status_code=400, detail="같은 직원이 여러 번 포함되어 있습니다.")
+
+    existing_ids = {e_id for (e_id,) in db.query(models.Employee.id).filter(models.Employee.id.in_(employee_ids))}
+    unknown = set(employee_ids) - existing_ids
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"존재하지 않는 직원: {sorted(unknown)}")
+
+    desired_dayoffs = {}
+    desired_positions = {}
+    for e in roster:
+        positions = {p.date: p.position for p in e.positions}
+        outside = [d for d in list(e.dayoffs) + list(positions) if not start <= d < end]
+        if outside:
+            raise HTTPException(status_code=400, detail=f"{year}년 {month}월이 아닌 날짜: {outside[0].isoformat()}")
+        desired_dayoffs[e.employee_id] = sorted(set(e.dayoffs))
+        desired_positions[e.employee_id] = positions
+
+    return desired_dayoffs, desired_positions
+
+
+def import_roster_month(db: Session, year: int, month: int, roster: List[schemas.RosterEmployee]):
+    """
+    여러 직원의 한 달 휴무/포지션을 한 트랜잭션으로 반영.
+    현재 상태를 테이블별 한 번씩 조회해 비교한 뒤 바뀐 행만 일괄 insert/update/delete.
+    """
+    start, end = month_range(year, month)
+    desired_dayoffs, desired_positions = _validate(db, year, month, roster)
+    employee_ids = list(desired_dayoffs)
+
+    # 현재 상태 조회
+    current_dayoffs = (
+        db.query(models.DayOff.id, models.DayOff.employee_id, models.DayOff.date, models.DayOff.order)
+        .filter(models.DayOff.employee_id.in_(employee_ids),
+                models.DayOff.date >= start,
+                models.DayOff.date < end)
+        .all()
+    )
+    current_positions = (
+        db.query(models.SpecialPosition.id, models.SpecialPosition.employee_id,
+                 models.SpecialPosition.date, models.SpecialPosition.position)
+        .filter(models.SpecialPosition.employee_id.in_(employee_ids),
+                models.SpecialPosition.date >= start,
+                models.SpecialPosition.date < end)
+        .all()
+    )
+
+    # 휴무 비교 (날짜 정렬 순서 = order)
+    dayoff_delete, dayoff_insert, dayoff_update = [], [], []
+    existing = {}
+    for row in current_dayoffs:
+        key = (row.employee_id, row.date)
+        if key in existing:
+            dayoff_delete.append(row.id)  # 중복 행 정리
+        else:
+            existing[key] = row
+    for e_id, dates in desired_dayoffs.items():
+        for idx, day in enumerate(dates, start=1):
+            row = existing.pop((e_id, day), None)
+            if row is None:
+                dayoff_insert.append({"employee_id": e_id, "date": day, "order": idx})
+            elif row.order != idx:
+                dayoff_update.append({"id": row.id, "order": idx})
+    dayoff_delete.extend(row.id for row in existing.values())
+
+    # 포지션 비교
+    position_delete, position_insert, position_update = [], [], []
+    existing = {}
+    for row in current_positions:
+        key = (row.employee_id, row.date)
+        if key in existing:
+            position_delete.append(row.id)
+        else:
+            existing[key] = row
+    for e_id, positions in desired_positions.items():
+        for day, position in positions.items():
+            row = existing.pop((e_id, day), None)
+            if row is None:
+                position_insert.append({"employee_id": e_id, "date": day, "position": position})
+            elif row.position != position:
+                position_update.append({"id": row.id, "position": position})
+    position_delete.extend(row.id for row in existing.values())
+
+    # 한 트랜잭션으로 일괄 반영
+    if dayoff_delete:
+        db.execute(delete(models.DayOff).where(models.DayOff.id.in_(dayoff_delete)))
+    if dayoff_insert:
+        db.execute(insert(models.DayOff), dayoff_insert)
+    if dayoff_update:
+        db.execute(update(models.DayOff), dayoff_update)
+    if position_delete:
+        db.execute(delete(models.SpecialPosition).where(models.SpecialPosition.id.in_(position_delete)))
+    if position_insert:
+        db.execute(insert(models.SpecialPosition), position_insert)
+    if position_update:
+        db.execute(update(models.SpecialPosition), position_update)
+    # 공유 버전은 데이터와 함께 commit
+    roster_version = roster_cache.bump(db)
+    availability_version = availability_index.bump(db)
+    db.commit()
+
+    roster_cache.invalidate_month(year, month, all_schedules=True, version=roster_version)
+    availability_index.invalidate_many(employee_ids, version=availability_version)
+
+    return {
+        "dayoffs": {"inserted": len(dayoff_insert), "updated": len(dayoff_update), "deleted": len(dayoff_delete)},
+        "positions": {"inserted": len(position_insert), "updated": len(position_update),
+                      "deleted": len(position_delete)},
+    }
+
+
+def export_roster_month(db: Session, year: int, month: int):
+    # (employee_id, name, date, kind, position) 를 직원 순서 / 날짜 순으로 반환
+    start, end = month_range(year, month)
+
+    dayoffs = (
+        db.query(models.Employee.order, models.Employee.id, models.Employee.name, models.DayOff.date)
+        .join(models.DayOff, models.DayOff.employee_id == models.Employee.id)  # type: ignore
+        .filter(models.DayOff.date >= start, models.DayOff.date < end)
+        .all()
+    )
+    positions = (
+        db.query(models.Employee.order, models.Employee.id, models.Employee.name,
+                 models.SpecialPosition.date, models.SpecialPosition.position)
+        .join(models.SpecialPosition, models.SpecialPosition.employee_id == models.Employee.id)  # type: ignore
+        .filter(models.SpecialPosition.date >= start, models.SpecialPosition.date < end)
+        .all()
+    )
+
+    rows = [(o if o is not None else 0, e_id, name, d, "dayoff", "") for o, e_id, name, d in dayoffs]
+    rows += [(o if o is not None else 0, e_id, name, d, "position", p) for o, e_id, name, d, p in positions]
+    rows.sort(key=lambda r: (r[0], r[1], r[3], r[4]))
+    return [r[1:] for r in rows]
@@ -0,0 +1,109 @@
+import threading
+from collections import OrderedDict
+
+from .versions import SharedVersion
+
+MAX_MONTHS = 24  # 메모리에 유지할 월 수
+
+
+class RosterCache:
+    """
+    (year, month) 별 근무표 스냅샷 (휴무 / 포지션 / 일별 근무 인원).
+    upsert 함수들이 커밋 전에 bump(db) (공유 카운터), 커밋 후 invalidate 하고, 조회는 메모리에서 바로 반환.
+    조회 중에 invalidate 되면 계산한 값은 저장하지 않음 (generation 비교).
+    다른 워커가 데이터를 바꾸면 공유 카운터로 감지해서 전체를 비움.
+    """
+
+    def __init__(self, max_months=MAX_MONTHS):
+        self.max_months = max_months
+        self._lock = threading.Lock()
+        self._months = OrderedDict()  # (year, month) -> {"dayoffs": ..., "positions": ..., "schedules": {...}}
+        self._generations = {}        # (year, month) -> int
+        self._epoch = 0               # invalidate_all 마다 증가
+        self._schedule_epoch = 0      # 일별 근무 인원 전체 삭제 마다 증가
+        self._shared = SharedVersion("roster_cache")
+
+    def _generation(self, key, kind):
+        schedule_epoch = self._schedule_epoch if kind == "schedules" else 0
+        return self._epoch, schedule_epoch, self._generations.get(key, 0)
+
+    def _bump(self, key):
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _lookup(self, key, kind, sub_key):
+        snapshot = self._months.get(key)
+        if snapshot is None:
+            return None
+        value = snapshot.get(kind)
+        if sub_key is not None and value is not None:
+            value = value.get(sub_key)
+        return value
+
+    def _store(self, key, kind, sub_key, value, generation):
+        if self._generation(key, kind) != generation:
+            return
+        snapshot = self._months.setdefault(key, {})
+        self._months.move_to_end(key)
+        if sub_key is None:
+            snapshot[kind] = value
+        else:
+            snapshot.setdefault(kind, {})[sub_key] = value
+        while len(self._months) > self.max_months:
+            self._months.popitem(last=False)
+
+    def _sync(self):
+        if self._shared.changed():
+            with self._lock:
+                self._clear()
+
+    def _clear(self):
+        self._epoch += 1
+        self._months.clear()
+
+    def get(self, year, month, kind, loader, sub_key=None):
+        key = (year, month)
+        self._sync()
+        with self._lock:
+            value = self._lookup(key, kind, sub_key)
+            if value is not None:
+                self._months.move_to_end(key)
+                return value
+            generation = self._generation(key, kind)
+
+        value = loader()
+
+        with self._lock:
+            self._store(key, kind, sub_key, value, generation)
+        return value
+
+    def version(self):
+        # 근무표 데이터가 바뀔 때마다 달라지는 공유 카운터 값 (ETag 용, 모든 워커 / 호스트에서 같음)
+        self._sync()
+        return self._shared.value
+
+    def bump(self, db):
+        # 데이터 변경과 같은 트랜잭션에서 공유 카운터 증가 (commit 전에 호출), 새 값은 invalidate 에 전달
+        return self._shared.bump(db)
+
+    def invalidate_month(self, year, month, all_schedules=False, version=None):
+        # all_schedules: 다른 달의 일별 근무 인원도 삭제 (다음 휴일까지 남은 날 계산이 바뀔 수 있음)
+        # version: bump() 가 돌려준 값 (없으면 이 프로세스의 캐시만 비움)
+        key = (year, month)
+        with self._lock:
+            self._bump(key)
+            self._months.pop(key, None)
+            if all_schedules:
+                self._schedule_epoch += 1
+                for snapshot in self._months.values():
+                    snapshot.pop("schedules", None)
+        if version is not None:
+            self._shared.follow(version)
+
+    def invalidate_all(self, version=None):
+        with self._lock:
+            self._clear()
+        if version is not None:
+            self._shared.follow(version)
+
+
+roster_cache = RosterCache()
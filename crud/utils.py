@@ -0,0 +1,22 @@
+from datetime import date
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# ON CONFLICT 를 지원하는 dialect 별 insert
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def month_range(year: int, month: int):
+    # [해당 월 1일, 다음 달 1일) 반열린 구간 -> 인덱스를 타는 범위 조건으로 사용
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def upsert_insert(db: Session, model):
+    # 현재 세션의 DB 에 맞는 insert (on_conflict_do_update 사용 가능)
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise NotImplementedError(f"ON CONFLICT 를 지원하지 않는 DB: {dialect}")
+    return UPSERT_INSERTS[dialect](model)
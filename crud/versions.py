@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import database
+import models
+from .utils import upsert_insert
+
+logger = logging.getLogger("uvicorn.error")
+
+load_dotenv()
+
+# 다른 워커 / 호스트의 변경을 확인하는 주기(ms): 그만큼 늦게 반영될 수 있음
+SHARED_VERSION_POLL_MS = int(os.getenv("SHARED_VERSION_POLL_MS", "500"))
+
+_versions = []  # 생성된 SharedVersion (기동 시 로드 / 백그라운드 확인 대상)
+
+
+def _initial_value():
+    # 새 카운터는 현재 시각(ms)에서 시작 -> DB 를 새로 만들어도 이전 값과 겹치지 않음
+    return int(time.time() * 1000)
+
+
+class SharedVersion:
+    """
+    워커 / 호스트마다 따로 들고 있는 캐시를 맞추기 위한 변경 카운터 (DATABASE_URL 의 cache_versions 테이블).
+    - 데이터를 바꾸는 쪽: 같은 세션에서 commit 전에 bump(db), commit 후 로컬 캐시를 비우고 follow(값)
+    - 다른 프로세스의 변경: poll_shared_versions 가 백그라운드에서 읽어 observe(), 조회 쪽은 changed() 가 True 면 비움
+    요청 경로(changed / value)는 메모리만 봄 (DB 를 읽지 않음).
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self._lock = threading.Lock()
+        self._seen = None    # 로컬 캐시가 반영한 값
+        self._latest = None  # DB 에서 마지막으로 확인한 값
+        _versions.append(self)
+
+    def bump(self, db: Session):
+        # 데이터 변경과 같은 트랜잭션에서 증가 (commit 은 호출한 쪽), 새 값 반환
+        stmt = upsert_insert(db, models.CacheVersion).values(key=self.key, value=_initial_value())
+        return db.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[models.CacheVersion.key],
+                set_={"value": models.CacheVersion.value + 1}
+            ).returning(models.CacheVersion.value)
+        )
+
+    def follow(self, value):
+        # commit 후 로컬 캐시를 비운 쪽에서 호출
+        with self._lock:
+            # 그 사이 다른 프로세스가 올리지 않았을 때만 따라감 (올렸다면 다음 changed() 에서 비움)
+            if self._seen is not None and value == self._seen + 1:
+                self._seen = value
+            self._observe(value)
+
+    def observe(self, value):
+        with self._lock:
+            self._observe(value)
+
+    def _observe(self, value):
+        if value is not None and (self._latest is None or value > self._latest):
+            self._latest = value
+
+    def reset(self, value):
+        # 기동 시: 로컬 캐시가 비어 있으므로 현재 값을 반영한 상태로 시작
+        with self._lock:
+            self._seen = self._latest = value
+
+    def changed(self):
+        with self._lock:
+            if self._latest is None or self._latest == self._seen:
+                return False
+            self._seen = self._latest
+            return True
+
+    @property
+    def value(self):
+        # 로컬 캐시가 반영한 값: 같은 데이터를 보는 프로세스끼리는 같은 값 (changed() 이후에 읽음)
+        return self._seen
+
+
+def _read_versions(conn):
+    rows = conn.execute(
+        select(models.CacheVersion.key, models.CacheVersion.value)
+        .where(models.CacheVersion.key.in_([v.key for v in _versions]))
+    )
+    return dict(rows.all())
+
+
+def load_shared_versions(engine):
+    # 기동 시 (요청 처리 전): 없는 카운터를 만들고 현재 값에서 시작
+    with Session(engine) as db:
+        for version in _versions:
+            db.execute(
+                upsert_insert(db, models.CacheVersion)
+                .values(key=version.key, value=_initial_value())
+                .on_conflict_do_nothing(index_elements=[models.CacheVersion.key])
+            )
+        db.commit()
+        values = _read_versions(db.connection())
+    for version in _versions:
+        version.reset(values.get(version.key))
+
+
+async def poll_shared_versions(interval=SHARED_VERSION_POLL_MS / 1000):
+    # 다른 워커 / 호스트의 변경을 주기적으로 확인 (async 엔진 -> 이벤트 루프를 막지 않음)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with database.async_engine.connect() as conn:
+                values = await conn.run_sync(_read_versions)
+        except Exception as e:
+            logger.error("캐시 버전 확인 실패: %s", e)
+            continue
+        for version in _versions:
+            version.observe(values.get(version.key))
@@ -1,20 +1,91 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from dotenv import load_dotenv
 import os
 
+from metrics import instrument_engine
+
+load_dotenv()
+
 DATA_DIR = "./data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# SQLite DB 파일 위치
-SQLALCHEMY_DATABASE_URL = "sqlite:///./data/schedule.db"
+# DB 주소 (기본: 로컬 SQLite 파일, 예: postgresql://user:pass@db:5432/schedule)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/schedule.db")
+
+# async 드라이버 (지정하지 않으면 DATABASE_URL 에서 유도)
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def to_async_url(url):
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"async 드라이버를 알 수 없는 DB: {url.get_backend_name()}")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+IS_SQLITE = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite"
+
+# SQLite 설정 (환경 변수로 조정)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")       # 읽기/쓰기가 서로 막지 않음
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")      # WAL 에서는 NORMAL 로 충분
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # 잠금 대기 시간
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))     # 커넥션별 페이지 캐시
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))  # 메모리 맵 I/O 크기
+
+# 커넥션 풀 (uvicorn 스레드풀 40 + 스케줄러 스레드 기준)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "32"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=not IS_SQLITE,  # 원격 DB 재시작 후 끊긴 커넥션 교체
 )
 
+
+def set_sqlite_pragmas(dbapi_connection, _connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+# async 라우터용 엔진 (같은 DB, 같은 설정)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=not IS_SQLITE,
+)
+
+if IS_SQLITE:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+# 쿼리 수 / 실행 시간 (/metrics)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 # DB 세션 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -25,3 +96,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def dedupe_employee_dates():
+    # 유니크 인덱스가 없던 예전 DB: 같은 직원/날짜 중복 행은 마지막 것만 남기고 기존 인덱스 교체
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in ("day_offs", "special_positions"):
+            if f"uq_{table}_employee_id_date" in {i["name"] for i in inspector.get_indexes(table)}:
+                continue
+            conn.execute(text(
+                f"DELETE FROM {table} WHERE id NOT IN "
+                f"(SELECT MAX(id) FROM {table} GROUP BY employee_id, date)"
+            ))
+            conn.execute(text(f"DROP INDEX IF EXISTS ix_{table}_employee_id_date"))
+
+
+def create_missing_indexes():
+    # create_all 은 이미 있는 테이블에 인덱스를 추가하지 않음 -> 기존 schedule.db 용
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,86 @@
+import json
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from compression import COMPRESSION_MIN_SIZE, ENCODINGS, compress_body, negotiate
+
+try:
+    import orjson
+except ImportError:  # orjson 이 없으면 표준 json 사용
+    orjson = None
+
+
+def encode_json(content):
+    # JSONResponse 와 같은 형식 (UTF-8, 공백 없음)
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """encode_json 으로 직렬화하는 JSONResponse (orjson 이 있으면 orjson)"""
+
+    def render(self, content) -> bytes:
+        return encode_json(content)
+
+
+def fast_json(content, response: Response = None):
+    """
+    response_model 검증 없이 바로 직렬화.
+    crud 가 이미 응답 스키마와 같은 모양(키 / 타입)으로 만든 값에만 사용.
+    의존성으로 받은 response 에 달린 헤더(ETag, 여러 개의 Set-Cookie 등)와 상태 코드는 그대로 옮김.
+    """
+    result = FastJSONResponse(content)
+    if response is not None:
+        result.raw_headers.extend((k, v) for k, v in response.raw_headers if k != b"content-length")
+        if response.status_code:
+            result.status_code = response.status_code
+    return result
+
+
+class EncodedJSON:
+    """한 번 인코딩한 JSON 본문과 미리 압축한 본문 (인코딩별)"""
+
+    __slots__ = ("body", "compressed")
+
+    def __init__(self, content):
+        self.body = encode_json(content)
+        self.compressed = {}
+        if len(self.body) >= COMPRESSION_MIN_SIZE:
+            self.compressed = {coding: compress_body(coding, self.body) for coding in ENCODINGS}
+
+    def __eq__(self, other):
+        return isinstance(other, EncodedJSON) and self.body == other.body
+
+    __hash__ = None
+
+
+class EncodedMemo:
+    """
+    원본 값들이 바뀌었을 때만 다시 인코딩.
+    캐시는 값이 갱신될 때만 새 객체를 돌려주므로 identity 로 비교 (딕셔너리 비교 / 인코딩 생략).
+    """
+
+    def __init__(self, build):
+        self.build = build    # 원본 값들 -> 응답 dict
+        self._current = None  # (원본 값들, EncodedJSON)
+
+    def get(self, *sources):
+        current = self._current
+        if current is not None and all(a is b for a, b in zip(current[0], sources)):
+            return current[1]
+        encoded = EncodedJSON(self.build(*sources))
+        self._current = (sources, encoded)
+        return encoded
+
+
+def encoded_response(request, encoded: EncodedJSON, status_code=200):
+    # 미리 만든 본문을 그대로 전송 (요청마다 json.dumps / 압축 없음)
+    headers = {"Vary": "Accept-Encoding"}
+    body = encoded.body
+    coding = negotiate(request.headers.get("accept-encoding"), tuple(encoded.compressed))
+    if coding is not None:
+        body = encoded.compressed[coding]
+        headers["Content-Encoding"] = coding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,142 @@
+import fcntl
+import logging
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+logger = logging.getLogger("uvicorn.error")
+
+DATA_DIR = "./data"
+LEADER_LOCK_PATH = os.getenv("LEADER_LOCK_PATH", os.path.join(DATA_DIR, "scheduler.lock"))
+STARTUP_LOCK_PATH = os.path.join(DATA_DIR, "startup.lock")
+LEADER_RETRY = 30  # 리더가 아닌 워커가 잠금을 다시 시도하는 주기(초)
+# PostgreSQL advisory lock 키 (같은 DB 를 쓰는 모든 호스트가 공유)
+LEADER_LOCK_KEY = zlib.crc32(b"commutemate:scheduler")
+STARTUP_LOCK_KEY = zlib.crc32(b"commutemate:startup")
+
+
+class LeaderLock:
+    """
+    파일 잠금(flock)으로 여러 워커 중 한 프로세스만 리더가 됨.
+    리더 프로세스가 죽으면 OS 가 잠금을 풀어 다른 워커가 이어받음.
+    """
+
+    def __init__(self, path=LEADER_LOCK_PATH):
+        self.path = path
+        self._file = None
+        self._stop = threading.Event()
+
+    @property
+    def is_leader(self):
+        return self._file is not None
+
+    def try_acquire(self):
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        f = open(self.path, "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def run_when_elected(self, on_elected, retry=LEADER_RETRY):
+        # 바로 리더가 되면 현재 스레드에서 실행, 아니면 백그라운드에서 주기적으로 재시도
+        if self.try_acquire():
+            on_elected()
+            return
+
+        def wait():
+            while not self._stop.wait(retry):
+                if self.try_acquire():
+                    logger.info("Scheduler leader elected (pid %s)", os.getpid())
+                    on_elected()
+                    return
+
+        threading.Thread(target=wait, name="leader-election", daemon=True).start()
+
+    def release(self):
+        self._stop.set()
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class AdvisoryLeaderLock(LeaderLock):
+    """
+    PostgreSQL advisory lock 으로 같은 DB 를 쓰는 모든 호스트 중 한 프로세스만 리더가 됨.
+    잠금을 잡은 커넥션을 계속 열어 두고, 프로세스가 죽어 커넥션이 끊기면 DB 가 잠금을 풂.
+    """
+
+    def __init__(self, engine, key=LEADER_LOCK_KEY):
+        super().__init__()
+        self.engine = engine
+        self.key = key
+        self._conn = None
+
+    @property
+    def is_leader(self):
+        return self._conn is not None
+
+    def try_acquire(self):
+        if self._conn is not None:
+            return True
+        conn = self.engine.connect()
+        try:
+            acquired = conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+            conn.commit()  # 세션 단위 잠금이라 트랜잭션을 끝내도 유지됨
+        except Exception:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def release(self):
+        self._stop.set()
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+                self._conn.commit()
+            finally:
+                self._conn.close()
+                self._conn = None
+
+
+def create_leader_lock(engine):
+    # PostgreSQL 이면 여러 호스트에서도 리더가 하나, 아니면(SQLite: 한 호스트) 파일 잠금
+    if engine.dialect.name == "postgresql":
+        return AdvisoryLeaderLock(engine)
+    return LeaderLock()
+
+
+@contextmanager
+def exclusive(path=STARTUP_LOCK_PATH, engine=None):
+    # 워커들이 동시에 기동할 때 테이블 생성 / 마이그레이션을 한 번에 하나씩 실행
+    # (PostgreSQL 이면 다른 호스트의 워커와도 advisory lock 으로 순서를 맞춤)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            if engine is not None and engine.dialect.name == "postgresql":
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": STARTUP_LOCK_KEY})
+                    conn.commit()
+                    try:
+                        yield
+                    finally:
+                        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": STARTUP_LOCK_KEY})
+                        conn.commit()
+            else:
+                yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
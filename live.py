@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+
+from encoded import EncodedJSON
+
+logger = logging.getLogger("uvicorn.error")
+
+POLL_INTERVAL = 5    # 캐시 확인 주기(초), upstream 요청은 캐시/미리 가져오기가 담당
+KEEPALIVE = 15       # 변화가 없을 때 연결 유지용 주석 전송 주기(초)
+RETRY_MS = 3000      # 연결이 끊겼을 때 브라우저 재연결 대기 시간
+
+KEEPALIVE_MESSAGE = b": keepalive\n\n"
+
+
+def encode_event(event, payload):
+    # 이미 인코딩된 본문(EncodedJSON)은 그대로 사용
+    if isinstance(payload, EncodedJSON):
+        data = payload.body
+    else:
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + data + b"\n\n"
+
+
+class LiveHub:
+    """
+    SSE 구독자 전체에 하나의 poll loop 결과를 push.
+    - 구독자가 있을 때만 loop 실행, 데이터가 바뀐 경우에만 전송
+    - 구독자별 큐 없이 하나의 Event 를 함께 기다림 (느린 구독자는 최신 값만 받음)
+    """
+
+    def __init__(self, poll, event="info", interval=POLL_INTERVAL, keepalive=KEEPALIVE):
+        self.poll = poll            # 현재 payload 를 돌려주는 coroutine 함수
+        self.event = event
+        self.interval = interval
+        self.keepalive = keepalive
+        self._payload = None
+        self._message = None        # 마지막으로 보낸 SSE 메시지 (새 구독자에게 바로 전송)
+        self._version = 0
+        self._changed = None        # loop 시작 시 생성 (실행 중인 이벤트 루프에 묶이도록)
+        self._subscribers = 0
+        self._task = None
+
+    @property
+    def subscribers(self):
+        return self._subscribers
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _publish(self, payload):
+        # 바뀐 경우에만 인코딩 후 전송
+        if payload == self._payload:
+            return False
+        self._payload = payload
+        self._message = encode_event(self.event, payload)
+        self._version += 1
+        self._wake()
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_wake = loop.time()
+        try:
+            while self._subscribers:
+                try:
+                    if self._publish(await self.poll()):
+                        last_wake = loop.time()
+                except Exception as e:
+                    logger.error("실시간 정보 갱신 실패: %s", e)
+                # 변화가 없어도 keepalive 주기마다 깨워서 주석 전송
+                if loop.time() - last_wake >= self.keepalive:
+                    self._wake()
+                    last_wake = loop.time()
+                await asyncio.sleep(self.interval)
+        finally:
+            self._task = None
+
+    def _ensure_running(self):
+        if self._task is None:
+            self._changed = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def subscribe(self):
+        # SSE 바이트 스트림 (연결이 끊기면 StreamingResponse 가 generator 를 닫음)
+        self._subscribers += 1
+        self._ensure_running()
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            version = 0
+            while True:
+                if self._version != version and self._message is not None:
+                    version = self._version
+                    yield self._message
+                    continue
+                changed = self._changed
+                await changed.wait()
+                if self._version == version:
+                    yield KEEPALIVE_MESSAGE
+        finally:
+            self._subscribers -= 1
@@ -1,29 +1,47 @@
 # main.py
-from fastapi.responses import JSONResponse
-import time
-from bus import get_bus_arrival
-from record_bus import init_csv, record_bus_info
-from weather_fetch import fetch_weather_json
+import asyncio
+from fastapi import Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from bus import BUS_TARGETS, get_bus_arrival_async, format_bus_info_json
+from record_bus import init_store, record_bus_info, flush_bus_records
+from bus_analytics import refresh_after_recording, refresh_pending
+from weather_fetch import fetch_weather_json_async, present_weather
+import upstream
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from fastapi import FastAPI
 import models
-from database import engine
-from routers import employees, dayoffs, positions
+from database import engine, create_missing_indexes, dedupe_employee_dates
+from crud.versions import load_shared_versions, poll_shared_versions
+from routers import employees, dayoffs, positions, buses, analytics, roster, weather
 from fastapi.middleware.cors import CORSMiddleware
+from cache import upstream_cache
+from prefetch import BUS_KEY, WEATHER_KEY, WEATHER_INTERVAL, request_expiration, register_prefetch_jobs
+from leader import create_leader_lock, exclusive
+from live import LiveHub
+from encoded import EncodedMemo, encoded_response
+from compression import CompressionMiddleware
+import metrics
 
 logger = logging.getLogger("uvicorn.error")
 kst = pytz.timezone('Asia/Seoul')
 scheduler = BackgroundScheduler(timezone=kst)
 
-# 메모리 캐시
-cache = {}
-BUS_CACHE_EXPIRATION = 5      # 버스 5초
+# 여러 워커 / 호스트로 실행할 때 스케줄러(버스 기록 / 집계 / 미리 가져오기)는 리더 한 곳에서만 실행
+leader = create_leader_lock(engine)
+
+# 메모리 캐시 (키별 single-flight + stale-while-revalidate)
+cache = upstream_cache
+BUS_CACHE_EXPIRATION = BUS_TARGETS["default"][1]  # 버스: 기본 대상의 ttl
 WEATHER_CACHE_EXPIRATION = 300  # 날씨 5분
 
-models.Base.metadata.create_all(bind=engine)
+with exclusive(engine=engine):
+    models.Base.metadata.create_all(bind=engine)
+    dedupe_employee_dates()
+    create_missing_indexes()
+    load_shared_versions(engine)
 
 app = FastAPI(title="CommuteMate API")
 
@@ -41,15 +59,44 @@ app.add_middleware(
     allow_headers=["*"],        # 허용할 헤더
 )
 
+# 응답 압축 (gzip / brotli, COMPRESSION_MIN_SIZE 이상만)
+app.add_middleware(CompressionMiddleware)  # type: ignore
+
+# 요청 처리 시간 / 요청당 DB 사용량 (가장 바깥에서 측정)
+app.add_middleware(metrics.MetricsMiddleware)  # type: ignore
+
+
+def present_info(bus, weather):
+    # 캐시에는 숫자 레코드를 두고 응답 문자열은 여기서 생성
+    return {
+        "bus": [format_bus_info_json(b) for b in bus],
+        "weather": present_weather(weather),
+    }
+
+
+# 버스/날씨 캐시 값이 바뀔 때만 다시 인코딩 (그 사이 요청은 같은 bytes 를 그대로 전송)
+info_body = EncodedMemo(present_info)
+
+
+async def load_info():
+    # 버스/날씨 동시 조회 -> 인코딩된 응답 본문
+    bus, weather = await asyncio.gather(
+        get_cached_data(BUS_KEY, get_bus_arrival_async,
+                        request_expiration(BUS_CACHE_EXPIRATION)),
+        get_cached_data(WEATHER_KEY, fetch_weather_json_async,
+                        request_expiration(max(WEATHER_CACHE_EXPIRATION, WEATHER_INTERVAL))),
+    )
+    return info_body.get(bus, weather)
+
+
+# /api/info 와 같은 데이터를 바뀔 때만 push (구독자 수와 관계없이 워커당 하나의 loop)
+live_hub = LiveHub(load_info)
+
 
 @app.get("/api/info")
-def bus_info():
+async def bus_info(request: Request):
     try:
-        result = {
-            "bus": get_cached_data("bus", get_bus_arrival, BUS_CACHE_EXPIRATION),
-            "weather": get_cached_data("weather", fetch_weather_json, WEATHER_CACHE_EXPIRATION),
-        }
-        return JSONResponse(content=result)
+        return encoded_response(request, await load_info())
     except Exception as e:
         error_content = {"error": str(e)}
 
@@ -59,20 +106,49 @@ def bus_info():
         return JSONResponse(content=error_content, status_code=500)
 
 
-def get_cached_data(key, fetch_func, expiration):
-    now = time.time()
-    if key in cache:
-        data, timestamp = cache[key]
-        if now - timestamp < expiration:
-            return data
-    data = fetch_func()
-    cache[key] = (data, now)
-    return data
+async def get_cached_data(key, fetch_coro_func, expiration):
+    return await cache.get_async(key, fetch_coro_func, expiration)
+
+
+# 실시간 버스/날씨 (Server-Sent Events, event: info)
+@app.get("/api/info/stream")
+async def bus_info_stream():
+    return StreamingResponse(
+        live_hub.subscribe(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Prometheus 수집용 지표 (워커별)
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.on_event("startup")
 def startup_event():
-    init_csv()
+    leader.run_when_elected(start_leader_jobs)
+
+
+@app.on_event("startup")
+async def start_version_poll():
+    # 다른 워커 / 호스트의 근무표 변경 확인 (요청 경로는 메모리만 봄)
+    app.state.version_poll = asyncio.ensure_future(poll_shared_versions())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.version_poll.cancel()
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    flush_bus_records()
+    leader.release()
+    await upstream.aclose()
+
+
+def start_leader_jobs():
+    init_store()
     start_scheduler()
 
 
@@ -92,6 +168,23 @@ def start_scheduler():
             id="record_bus_job",
             replace_existing=True
         )
+        # 기록 구간이 끝나면 버퍼에 남은 샘플 저장
+        scheduler.add_job(
+            func=flush_bus_records,
+            trigger="date",
+            run_date=end_time + timedelta(seconds=30),
+            id="flush_bus_job",
+            replace_existing=True
+        )
+
+        # 저장된 샘플로 통계 집계 (새로 쌓인 날짜만)
+        scheduler.add_job(
+            func=refresh_after_recording,
+            trigger="date",
+            run_date=end_time + timedelta(minutes=1),
+            id="bus_analytics_job",
+            replace_existing=True
+        )
         logger.info("Interval job registered for today: %s ~ %s", start_time, end_time)
 
     scheduler.add_job(
@@ -103,6 +196,19 @@ def start_scheduler():
         replace_existing=True
     )
 
+    # 기동 시 밀린 날짜 집계
+    scheduler.add_job(
+        func=refresh_pending,
+        id="bus_analytics_startup_job",
+        replace_existing=True
+    )
+
+    # 버스/날씨 데이터 미리 갱신
+    register_prefetch_jobs(scheduler, cache)
+
+    # 작업 지연 / 실패 / 누락 집계
+    metrics.instrument_scheduler(scheduler)
+
     scheduler.start()
     logger.info("Scheduler started with daily cron job")
 
@@ -110,3 +216,7 @@ def start_scheduler():
 app.include_router(employees.router)
 app.include_router(dayoffs.router)
 app.include_router(positions.router)
+app.include_router(roster.router)
+app.include_router(buses.router)
+app.include_router(analytics.router)
+app.include_router(weather.router)
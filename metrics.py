@@ -0,0 +1,228 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+from sqlalchemy import event
+
+# Prometheus 텍스트 형식 (0.0.4) 으로 내보내는 프로세스별 지표
+# 여러 워커로 실행하면 워커마다 따로 집계됨 (스케줄러 지표는 리더 워커에만 있음)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+INF_BOUND = 'le="+Inf"'
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda kv: tuple(map(str, kv[0])))
+        for key, value in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(float(b) for b in buckets)
+        self._lock = threading.Lock()
+        self._values = {}  # labels -> [버킷별 개수 (누적 아님), 합계, 개수]
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted(
+                ((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()),
+                key=lambda kv: tuple(map(str, kv[0]))
+            )
+        bounds = ['le="%g"' % b for b in self.buckets]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, [bound])} {cumulative}"
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, [INF_BOUND])} {count}"
+            labels = _labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# ---- 지표 ----
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "요청 처리 시간 (route 는 경로 템플릿)", ("method", "route", "status"))
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "캐시 조회 결과 (hit / stale / miss)", ("cache", "kind", "result"))
+UPSTREAM_DURATION = Histogram(
+    "upstream_fetch_duration_seconds", "외부 API 조회 시간 (재시도 포함)", ("host", "result"))
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total", "외부 API 재시도 횟수", ("host",))
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL 문 실행 시간")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "요청당 SQL 문 수", ("route",), buckets=COUNT_BUCKETS)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "요청당 SQL 실행 시간 합계", ("route",))
+JOB_LAG = Histogram(
+    "scheduler_job_lag_seconds", "스케줄러 작업의 예정 시각 대비 실행 지연", ("job",), buckets=LAG_BUCKETS)
+JOB_EVENTS = Counter(
+    "scheduler_job_events_total", "스케줄러 작업 실패 / 누락 횟수", ("job", "event"))
+BUS_RECORDS = Counter(
+    "bus_record_runs_total", "버스 도착 정보 기록 결과", ("result",))
+
+
+# ---- 요청별 DB 집계 ----
+
+class RequestStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# 요청 처리 중인 task / 스레드풀 / async 세션 greenlet 에 함께 전달됨 (요청 밖이면 None)
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+def _handle_error(context):
+    # 실행 중 예외가 나면 after_cursor_execute 가 호출되지 않으므로 시작 시각을 여기서 버림
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _route_label(scope):
+    # FastAPI 라우트는 scope["route"], Starlette 기본 라우트(/openapi.json, /docs 등)는 endpoint 로 찾음
+    route = scope.get("route")
+    if route is None and "endpoint" in scope and "app" in scope:
+        endpoint = scope["endpoint"]
+        route = next((r for r in getattr(scope["app"], "routes", ())
+                      if getattr(r, "endpoint", None) is endpoint), None)
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """요청 처리 시간 / 요청당 DB 사용량 기록 (SSE 처럼 오래 열려 있는 스트림은 처리 시간에서 제외)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        response = {"status": 500, "stream": False}
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        response["stream"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_stats.reset(token)
+            route = _route_label(scope)
+            if not response["stream"]:
+                REQUEST_DURATION.observe(time.perf_counter() - start,
+                                         method=scope["method"], route=route, status=response["status"])
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route=route)
+            DB_TIME_PER_REQUEST.observe(stats.seconds, route=route)
+
+
+# ---- 스케줄러 ----
+
+def _job_listener(job_event):
+    if job_event.code == EVENT_JOB_SUBMITTED:
+        now = time.time()
+        for run_time in job_event.scheduled_run_times:
+            JOB_LAG.observe(max(0.0, now - run_time.timestamp()), job=job_event.job_id)
+    elif job_event.code == EVENT_JOB_ERROR:
+        JOB_EVENTS.inc(job=job_event.job_id, event="error")
+    elif job_event.code == EVENT_JOB_MISSED:
+        JOB_EVENTS.inc(job=job_event.job_id, event="missed")
+
+
+def instrument_scheduler(scheduler):
+    scheduler.add_listener(_job_listener, EVENT_JOB_SUBMITTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import BigInteger, Column, Integer, String, Date, Index
 from database import Base
 
 
@@ -13,6 +13,10 @@ class Employee(Base):
 
 class DayOff(Base):
     __tablename__ = "day_offs"
+    __table_args__ = (
+        Index("uq_day_offs_employee_id_date", "employee_id", "date", unique=True),
+        Index("ix_day_offs_date", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer)
@@ -22,8 +26,20 @@ class DayOff(Base):
 
 class SpecialPosition(Base):
     __tablename__ = "special_positions"
+    __table_args__ = (
+        Index("uq_special_positions_employee_id_date", "employee_id", "date", unique=True),
+        Index("ix_special_positions_date", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer)
     date = Column(Date)
     position = Column(String)  # 근무 형태
+
+
+class CacheVersion(Base):
+    # 워커 / 호스트 간 캐시 무효화 카운터 (crud.versions.SharedVersion)
+    __tablename__ = "cache_versions"
+
+    key = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False)
@@ -0,0 +1,134 @@
+import os
+import logging
+from datetime import datetime, time as dt_time
+
+import pytz
+from dotenv import load_dotenv
+
+from bus import get_bus_arrival, bus_cache_key, BUS_TARGETS, DEFAULT_TARGET
+from weather_fetch import fetch_weather_json, load_forecast, VILLAGE
+
+logger = logging.getLogger("uvicorn.error")
+kst = pytz.timezone('Asia/Seoul')
+
+load_dotenv()
+
+BUS_KEY = bus_cache_key(DEFAULT_TARGET)
+WEATHER_KEY = "weather"
+
+# 출퇴근 시간대 (예: "04:30-05:30,17:30-19:00")
+COMMUTE_WINDOWS = os.getenv("COMMUTE_WINDOWS", "04:30-05:30")
+
+BUS_TICK = 5                # 스케줄러 체크 주기(초)
+BUS_COMMUTE_INTERVAL = 5    # 출퇴근 시간대 갱신 주기
+BUS_DAY_INTERVAL = 60       # 그 외 낮 시간 갱신 주기
+BUS_NIGHT_INTERVAL = 600    # 심야 갱신 주기
+NIGHT_START = dt_time(0, 0)
+NIGHT_END = dt_time(4, 0)
+
+WEATHER_INTERVAL = 300      # 날씨 5분
+
+# 요청 경로에서는 이만큼 더 지난 값만 갱신 (미리 가져오기가 제때 돌고 있으면 요청에서 upstream 호출 없음)
+PREFETCH_GRACE = 10
+VILLAGE_INTERVAL = 600      # 단기예보 확인 주기 (새 발표분이 있을 때만 실제로 요청)
+
+
+def parse_windows(value):
+    windows = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, end = part.split("-")
+        windows.append((dt_time.fromisoformat(start.strip()), dt_time.fromisoformat(end.strip())))
+    return windows
+
+
+commute_windows = parse_windows(COMMUTE_WINDOWS)
+
+
+def bus_interval(now=None):
+    # 현재 시각 기준 버스 갱신 주기
+    now = now or datetime.now(kst)
+    t = now.time()
+    if any(start <= t < end for start, end in commute_windows):
+        return BUS_COMMUTE_INTERVAL
+    if NIGHT_START <= t < NIGHT_END:
+        return BUS_NIGHT_INTERVAL
+    return BUS_DAY_INTERVAL
+
+
+def request_expiration(ttl):
+    """
+    요청 경로의 캐시 만료 시간.
+    대상별 ttl 을 그대로 따름 -> 심야처럼 미리 가져오기 주기가 ttl 보다 길어도
+    요청이 들어오면 ttl + PREFETCH_GRACE 가 지난 값은 요청에서 갱신됨.
+    """
+    return ttl + PREFETCH_GRACE
+
+
+def prefetch_bus(cache):
+    # BUS_TICK 마다 실행, 등록된 대상별로 시간대별 주기가 지났을 때만 갱신
+    interval = bus_interval()
+    for target, ttl in BUS_TARGETS.values():
+        key = bus_cache_key(target)
+        age = cache.age(key)
+        if age is not None and age < max(ttl, interval) - 0.5:
+            continue
+        try:
+            cache.refresh(key, lambda: get_bus_arrival(target))
+        except Exception as e:
+            logger.error("버스 정보 미리 가져오기 실패 (%s): %s", key, e)
+
+
+def prefetch_weather(cache):
+    try:
+        cache.refresh(WEATHER_KEY, fetch_weather_json)
+    except Exception as e:
+        logger.error("날씨 정보 미리 가져오기 실패: %s", e)
+
+
+def prefetch_village():
+    # 기본 위치 단기예보 (발표 시각별로 캐시되므로 같은 발표분은 다시 요청하지 않음)
+    if load_forecast(product=VILLAGE) is None:
+        logger.error("단기예보 미리 가져오기 실패")
+
+
+def register_prefetch_jobs(scheduler, cache):
+    now = datetime.now(kst)
+
+    scheduler.add_job(
+        func=prefetch_bus,
+        args=[cache],
+        trigger="interval",
+        seconds=BUS_TICK,
+        next_run_time=now,
+        id="prefetch_bus_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+    scheduler.add_job(
+        func=prefetch_weather,
+        args=[cache],
+        trigger="interval",
+        seconds=WEATHER_INTERVAL,
+        next_run_time=now,
+        id="prefetch_weather_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+    scheduler.add_job(
+        func=prefetch_village,
+        trigger="interval",
+        seconds=VILLAGE_INTERVAL,
+        next_run_time=now,
+        id="prefetch_village_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    logger.info("Prefetch jobs registered (commute windows: %s)", COMMUTE_WINDOWS)
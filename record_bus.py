@@ -1,49 +1,187 @@
 import csv
+import logging
 import os
+import sqlite3
+import threading
 from datetime import datetime
 import pytz
 
-from bus import get_bus_arrival
+from bus import get_bus_arrival, eta_to_seconds, position_to_stops
+from metrics import BUS_RECORDS
+
+logger = logging.getLogger("uvicorn.error")
 
 DATA_DIR = "./data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# 월 단위로 파티션된 SQLite 파일 (data/bus/bus_2025_01.db ...)
+STORE_DIR = os.path.join(DATA_DIR, "bus")
 CSV_FILE = os.path.join(DATA_DIR, "bus_data.csv")
 
+FLUSH_SIZE = 40  # 버퍼가 이만큼 쌓이면 기록 (15초 간격 x 버스 2대 = 약 5분)
+
 kst = pytz.timezone('Asia/Seoul')
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bus_samples (
+    recorded_at INTEGER NOT NULL,   -- 기록 시각 (epoch 초)
+    vehicle_rank INTEGER NOT NULL,  -- 1: 첫 번째 버스, 2: 두 번째 버스
+    eta_seconds INTEGER,            -- 도착까지 남은 시간(초), 출발 대기 등은 NULL
+    arrival_at INTEGER,             -- 예상 도착 시각 (epoch 초)
+    stops_remaining INTEGER,        -- 남은 정류장 수
+    plate_no TEXT                   -- 차량 번호
+);
+CREATE INDEX IF NOT EXISTS idx_bus_samples_recorded_at ON bus_samples (recorded_at);
+"""
+
+INSERT_SQL = (
+    "INSERT INTO bus_samples (recorded_at, vehicle_rank, eta_seconds, arrival_at, stops_remaining, plate_no) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def partition_path(epoch):
+    dt = datetime.fromtimestamp(epoch, kst)
+    return os.path.join(STORE_DIR, f"bus_{dt.year}_{dt.month:02d}.db")
+
+
+def partition_paths():
+    # 오래된 파티션부터
+    if not os.path.isdir(STORE_DIR):
+        return []
+    return [os.path.join(STORE_DIR, f) for f in sorted(os.listdir(STORE_DIR))
+            if f.startswith("bus_") and f.endswith(".db")]
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def to_rows(buses):
+    # BusSnapshot -> bus_samples 행 (조회 시각 = 기록 시각)
+    return [
+        (bus.observed_at, rank, bus.eta_seconds, bus.arrival_epoch, bus.stops_remaining, bus.bus_no or None)
+        for rank, bus in enumerate(buses, start=1)
+    ]
+
+
+class BusRecorder:
+    """샘플을 메모리에 모아 두었다가 파티션별로 한 번에 기록"""
+
+    def __init__(self, flush_size=FLUSH_SIZE):
+        self.flush_size = flush_size
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def append(self, rows):
+        with self._lock:
+            self._buffer.extend(rows)
+            should_flush = len(self._buffer) >= self.flush_size
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
 
-def init_csv():
+        partitions = {}
+        for row in rows:
+            partitions.setdefault(partition_path(row[0]), []).append(row)
+
+        os.makedirs(STORE_DIR, exist_ok=True)
+        failed, error = [], None
+        for path, part_rows in partitions.items():
+            try:
+                conn = connect(path)
+                try:
+                    with conn:
+                        conn.executemany(INSERT_SQL, part_rows)
+                finally:
+                    conn.close()
+            except Exception as e:
+                failed.extend(part_rows)
+                error = e
+
+        if error is not None:
+            # 기록하지 못한 행은 다음 flush 때 다시 시도
+            with self._lock:
+                self._buffer[:0] = failed
+            raise error
+        return len(rows)
+
+
+recorder = BusRecorder()
+
+
+def migrate_csv():
+    # 예전 CSV 기록을 파티션 저장소로 옮기고 파일 이름 변경 (옮긴 행이 없으면 그대로 둠)
+    if not os.path.exists(CSV_FILE):
+        return 0
+
+    rows = []
+    # 중간에 BOM 이 섞여 있을 수 있어 줄마다 제거
+    with open(CSV_FILE, newline="", encoding="utf-8") as f:
+        for record in csv.reader(line.replace("\ufeff", "") for line in f):
+            if not record or record[0] == "recorded_at":
+                continue
+            recorded_at_str, eta, _expected_arrival, remaining_stops = (record + [""] * 4)[:4]
+            try:
+                recorded_at = int(datetime.fromisoformat(recorded_at_str).timestamp())
+            except ValueError:
+                continue
+            eta_seconds = eta_to_seconds(eta)
+            arrival_at = recorded_at + eta_seconds if eta_seconds is not None else None
+            rows.append((recorded_at, 1, eta_seconds, arrival_at, position_to_stops(remaining_stops), None))
+
+    if not rows:
+        return 0
+
+    migrator = BusRecorder(flush_size=len(rows) + 1)
+    migrator.append(rows)
+    count = migrator.flush()
+    os.replace(CSV_FILE, CSV_FILE + ".migrated")
+    return count
+
+
+def init_store():
+    os.makedirs(STORE_DIR, exist_ok=True)
     try:
-        with open(CSV_FILE, "x", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["recorded_at", "eta", "expected_arrival", "remaining_stops"])
-    except FileExistsError:
-        # 이미 파일이 있으면 무시
-        pass
+        count = migrate_csv()
+        if count:
+            logger.info("Migrated bus CSV rows: %s", count)
+    except Exception as e:
+        logger.error("버스 CSV 이전 실패: %s", e)
 
 
 def record_bus_info():
     try:
         buses = get_bus_arrival()
+        if not buses:
+            BUS_RECORDS.inc(result="empty")
+            return
 
-        first_bus = buses[0]
+        recorder.append(to_rows(buses))
+        BUS_RECORDS.inc(result="ok")
 
-        minutes_to_arrival = first_bus.get("eta")
-        expected_arrival = first_bus.get("arrival_time")
-        remaining_stops = first_bus.get("position")
-
-        now = datetime.now(kst)
+    except Exception as e:
+        BUS_RECORDS.inc(result="error")
+        logger.error("버스 도착 정보 기록 실패: %s", e)
 
-        # CSV에 기록
-        with open(CSV_FILE, "a", newline="", encoding="utf-8-sig") as f:
-            writer = csv.writer(f)
-            writer.writerow([now.isoformat(), minutes_to_arrival, expected_arrival, remaining_stops])
 
+def flush_bus_records():
+    try:
+        recorder.flush()
     except Exception as e:
-        print("Error recording bus info:", e)
+        logger.error("버스 기록 저장 실패: %s", e)
 
 
 if __name__ == "__main__":
-    init_csv()
-    record_bus_info()
\ No newline at end of file
+    init_store()
+    record_bus_info()
+    flush_bus_records()
@@ -0,0 +1,37 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query
+import bus_analytics
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# weekday: 0(월) ~ 6(일), 생략하면 전체
+
+
+# 시간대별 ETA 분포
+@router.get("/eta")
+def get_eta_distribution(weekday: Optional[int] = Query(None, ge=0, le=6)):
+    return {"weekday": weekday, "slots": bus_analytics.eta_distribution(weekday)}
+
+
+# 도착 시각 백분위
+@router.get("/arrivals")
+def get_arrival_percentiles(weekday: Optional[int] = Query(None, ge=0, le=6), seq: int = Query(1, ge=1)):
+    return {"weekday": weekday, "seq": seq, **bus_analytics.arrival_percentiles(weekday, seq)}
+
+
+# 첫 번째/두 번째 버스 간격
+@router.get("/headway")
+def get_headway(weekday: Optional[int] = Query(None, ge=0, le=6)):
+    return {"weekday": weekday, **bus_analytics.headway_percentiles(weekday)}
+
+
+# 출발 권장 시각
+@router.get("/leave-by")
+def get_leave_by(
+    weekday: Optional[int] = Query(None, ge=0, le=6),
+    seq: int = Query(1, ge=1),
+    walk_minutes: int = Query(5, ge=0, le=120),
+    confidence: float = Query(0.9, gt=0, lt=1)
+):
+    return {"weekday": weekday, "seq": seq, **bus_analytics.leave_by(weekday, seq, walk_minutes, confidence)}
@@ -0,0 +1,54 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+import schemas
+from bus import BUS_TARGETS, bus_cache_key, get_bus_arrival_async, format_bus_info_json
+from cache import upstream_cache
+from prefetch import request_expiration
+
+router = APIRouter(prefix="/api/bus", tags=["bus"])
+
+MAX_TARGETS = 10  # 한 번에 조회 가능한 대상 수
+
+
+# 등록된 조회 대상 목록
+@router.get("/targets")
+def get_targets():
+    return {
+        "targets": [
+            {"name": name, "st_id": t.st_id, "bus_route_id": t.bus_route_id, "ord": t.ord, "ttl": ttl}
+            for name, (t, ttl) in BUS_TARGETS.items()
+        ]
+    }
+
+
+# 여러 정류소/노선 도착 정보 동시 조회
+@router.post("/arrivals")
+async def get_arrivals(req: schemas.BusArrivalsRequest):
+    names = list(dict.fromkeys(req.targets))  # 중복 제거 (순서 유지)
+    if len(names) > MAX_TARGETS:
+        raise HTTPException(status_code=400, detail=f"최대 {MAX_TARGETS}개까지 조회할 수 있습니다.")
+
+    unknown = [n for n in names if n not in BUS_TARGETS]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"등록되지 않은 대상: {unknown}")
+
+    # 대상별 캐시 키로 조회 -> 같은 대상은 사용자 수와 관계없이 한 번만 fetch
+    async def fetch(name):
+        target, ttl = BUS_TARGETS[name]
+        return await upstream_cache.get_async(
+            bus_cache_key(target),
+            lambda: get_bus_arrival_async(target),
+            request_expiration(ttl)
+        )
+
+    results = await asyncio.gather(*(fetch(n) for n in names), return_exceptions=True)
+
+    arrivals = []
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            arrivals.append({"target": name, "buses": [], "error": str(result)})
+        else:
+            arrivals.append({"target": name, "buses": [format_bus_info_json(b) for b in result]})
+
+    return {"arrivals": arrivals}
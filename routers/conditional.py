@@ -0,0 +1,46 @@
+from starlette.requests import Request
+from starlette.responses import Response
+
+from crud import roster_cache
+
+
+def make_etag(*parts):
+    # 데이터 버전 기준이라 weak (압축 여부와 관계없이 200 / 304 가 같은 값)
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+
+def _opaque(tag):
+    # If-None-Match 는 weak 비교: W/ 를 떼고 비교
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+# 버전은 DB 의 공유 카운터라 워커 / 재시작과 관계없이 같은 데이터면 같은 ETag
+# (근무표가 바뀌면 모든 월의 ETag 가 함께 바뀜)
+def month_etag(kind: str, year: int, month: int):
+    return make_etag(kind, year, month, roster_cache.version())
+
+
+def employees_etag():
+    return make_etag("employees", roster_cache.version())
+
+
+def etag_matches(request: Request, etag: str):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {_opaque(t.strip()) for t in if_none_match.split(",")}
+    return _opaque(etag) in tags
+
+
+def conditional(request: Request, response: Response, etag: str):
+    """
+    If-None-Match 가 현재 ETag 와 같으면 304 응답을 반환 (DB 조회 / 응답 모델 생성 없이).
+    다르면 response 에 ETag 를 달고 None 반환.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
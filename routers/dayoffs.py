@@ -1,26 +1,38 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud, schemas
-from database import get_db
+from crud.availability import MIN_DATE
+from database import get_async_db
+from encoded import fast_json
+from .conditional import conditional, month_etag
+from .params import YearPath, MonthPath
 
 router = APIRouter(prefix="/dayoffs", tags=["dayoffs"])
 
+MAX_RANGE_DAYS = 366  # 근무 가능일 조회 최대 기간
+
 
 # 한 직원의 한달 휴무 조회
 @router.get("/dayoff-month/{employee_id}/{year}/{month}", response_model=schemas.DayOffEmployeeMonthResponse)
-def get_employee_month_dayoffs(
+async def get_employee_month_dayoffs(
     employee_id: int,
-    year: int,
-    month: int,
-    db: Session = Depends(get_db)
+    year: YearPath,
+    month: MonthPath,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.get_employee_dayoffs_by_month(db, year, month, employee_id)
+    not_modified = conditional(request, response, month_etag("dayoffs", year, month))
+    if not_modified:
+        return not_modified
+    # crud 결과가 이미 응답 모양이므로 response_model 검증 없이 직렬화 (response_model 은 문서용)
+    return fast_json(await crud.aio.get_employee_dayoffs_by_month(db, year, month, employee_id), response)
 
 
 # 한 직원의 한달 휴무 수정
 @router.post("/dayoff-month/")
-def upsert_employee_month(dayoffs: schemas.EmployeeMonthDayOff, db: Session = Depends(get_db)):
-    crud.upsert_employee_month_dayoffs(
+async def upsert_employee_month(dayoffs: schemas.EmployeeMonthDayOff, db: AsyncSession = Depends(get_async_db)):
+    await crud.aio.upsert_employee_month_dayoffs(
         db,
         employee_id=dayoffs.employee_id,
         dates=dayoffs.dates,
@@ -32,12 +44,32 @@ def upsert_employee_month(dayoffs: schemas.EmployeeMonthDayOff, db: Session = De
 
 # 전체 직원의 한달 휴무 조회
 @router.post("/month", response_model=schemas.DayOffMonthResponse)
-def read_month_dayoffs(req: schemas.MonthDayOffRequest, db: Session = Depends(get_db)):
-    dayoffs = crud.get_dayoffs_by_month(db, req.year, req.month)
-    return {"dayoffs": dayoffs}
+async def read_month_dayoffs(req: schemas.MonthDayOffRequest, request: Request, response: Response,
+                             db: AsyncSession = Depends(get_async_db)):
+    not_modified = conditional(request, response, month_etag("dayoffs", req.year, req.month))
+    if not_modified:
+        return not_modified
+    dayoffs = await crud.aio.get_dayoffs_by_month(db, req.year, req.month)
+    return fast_json({"dayoffs": dayoffs}, response)
 
 
 # 특정 직원들과 근무 교집합 조회
 @router.post("/work-intersection")
-def get_work_intersection(req: schemas.EmployeeWorkIntersectionRequest, db: Session = Depends(get_db)):
-    return crud.get_work_intersection(db, req.year, req.month, req.names)
+async def get_work_intersection(req: schemas.EmployeeWorkIntersectionRequest, db: AsyncSession = Depends(get_async_db)):
+    if req.year < MIN_DATE.year:
+        raise HTTPException(status_code=400, detail=f"{MIN_DATE.year}년 이후만 조회할 수 있습니다.")
+    return await crud.aio.get_work_intersection(db, req.year, req.month, req.names)
+
+
+# 기간 내 근무 가능일 조회 (모두 근무 / k 명 이상 근무)
+@router.post("/work-availability")
+async def get_work_availability(req: schemas.WorkAvailabilityRequest, db: AsyncSession = Depends(get_async_db)):
+    if req.start > req.end or req.start < MIN_DATE or (req.end - req.start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"기간은 {MAX_RANGE_DAYS}일 이내로 지정해 주세요.")
+
+    if req.min_count is not None and req.min_count < 0:
+        raise HTTPException(status_code=400, detail="min_count 는 0 이상이어야 합니다.")
+
+    if req.min_count is None:
+        return {"dates": await crud.aio.all_working_days(db, req.names, req.start, req.end)}
+    return {"dates": await crud.aio.at_least_k_working_days(db, req.names, req.start, req.end, req.min_count)}
@@ -1,18 +1,20 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from datetime import datetime
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from starlette.responses import JSONResponse
 import schemas
 import crud
-from database import get_db
+from database import get_async_db
+from .conditional import conditional, employees_etag, month_etag
 
 router = APIRouter(prefix="/employees", tags=["employees"])
 
 
 # 직원 추가
 @router.post("/")
-def create(employee: schemas.EmployeeCreateAndUpdate, db: Session = Depends(get_db)):
-    crud.create_employee(db, employee)
+async def create(employee: schemas.EmployeeCreateAndUpdate, db: AsyncSession = Depends(get_async_db)):
+    await crud.aio.create_employee(db, employee)
     return JSONResponse(
         content={"message": "직원이 성공적으로 추가되었습니다."},
         status_code=status.HTTP_201_CREATED
@@ -21,41 +23,55 @@ def create(employee: schemas.EmployeeCreateAndUpdate, db: Session = Depends(get_
 
 # 직원 전체 조회
 @router.get("/", response_model=schemas.EmployeeResponse)
-def read_all(db: Session = Depends(get_db)):
-    employees = crud.get_employees(db)
+async def read_all(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = conditional(request, response, employees_etag())
+    if not_modified:
+        return not_modified
+    employees = await crud.aio.get_employees(db)
     return {"employees": employees}
 
 
 # 직원 전체 이름 조회
 @router.get("/names", response_model=schemas.EmployeeNamesResponse)
-def get_names(db: Session = Depends(get_db)):
-    employees_names = crud.get_names(db)
+async def get_names(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = conditional(request, response, employees_etag())
+    if not_modified:
+        return not_modified
+    employees_names = await crud.aio.get_names(db)
     return {"employees_names": employees_names}
 
 
 # 직원 전체 순서 수정
 @router.put("/order", response_model=schemas.EmployeeOrderResponse)
-def change_employee_order(employee_order: schemas.EmployeeOrderRequest, db: Session = Depends(get_db)):
-    return crud.change_employee_order(db, employee_order)
+async def change_employee_order(employee_order: schemas.EmployeeOrderRequest, db: AsyncSession = Depends(get_async_db)):
+    return await crud.aio.change_employee_order(db, employee_order)
 
 
 # 직원 전체 순서 조회
 @router.get("/order", response_model=schemas.EmployeeOrderResponse)
-def get_employee_order(db: Session = Depends(get_db)):
-    return crud.get_employee_order(db)
+async def get_employee_order(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = conditional(request, response, employees_etag())
+    if not_modified:
+        return not_modified
+    return await crud.aio.get_employee_order(db)
 
 
 # 특정 직원 조회
 @router.get("/{employee_id}", response_model=schemas.EmployeeGetResponse)
-def get_employee_detail(employee_id: int, db: Session = Depends(get_db)):
-    employee = crud.get_employee(db, employee_id)
+async def get_employee_detail(employee_id: int, request: Request, response: Response,
+                              db: AsyncSession = Depends(get_async_db)):
+    not_modified = conditional(request, response, employees_etag())
+    if not_modified:
+        return not_modified
+    employee = await crud.aio.get_employee(db, employee_id)
     return {"employee": employee}
 
 
 # 특정 직원 수정
 @router.put("/{employee_id}", response_model=schemas.EmployeeGetResponse)
-def update(employee_id: int, employee_update: schemas.EmployeeCreateAndUpdate, db: Session = Depends(get_db)):
-    updated_employee = crud.update_employee(db, employee_id, employee_update)
+async def update(employee_id: int, employee_update: schemas.EmployeeCreateAndUpdate,
+                 db: AsyncSession = Depends(get_async_db)):
+    updated_employee = await crud.aio.update_employee(db, employee_id, employee_update)
     if not updated_employee:
         return JSONResponse(
             content={"message": "직원을 찾을 수 없습니다."},
@@ -66,5 +82,10 @@ def update(employee_id: int, employee_update: schemas.EmployeeCreateAndUpdate, d
 
 # 특정 날의 근무 인원 조회
 @router.get("/schedules/{date}", response_model=schemas.EmployeeSchedulesResponse)
-def get_employee_schedules(date: str, db: Session = Depends(get_db)):
-    return crud.get_employee_schedules(db, date)
+async def get_employee_schedules(date: str, request: Request, response: Response,
+                                 db: AsyncSession = Depends(get_async_db)):
+    query_date = datetime.strptime(date, "%Y-%m-%d").date()
+    not_modified = conditional(request, response, month_etag("schedules", query_date.year, query_date.month))
+    if not_modified:
+        return not_modified
+    return await crud.aio.get_employee_schedules(db, date)
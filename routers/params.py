@@ -0,0 +1,6 @@
+from fastapi import Path
+from typing_extensions import Annotated
+
+# 경로로 받는 연, 월 (schemas.Year / schemas.Month 와 같은 범위)
+YearPath = Annotated[int, Path(ge=1, le=9998)]
+MonthPath = Annotated[int, Path(ge=1, le=12)]
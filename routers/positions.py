@@ -1,37 +1,50 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud, schemas
-from database import get_db
+from database import get_async_db
+from encoded import fast_json
+from .conditional import conditional, month_etag
+from .params import YearPath, MonthPath
 
 router = APIRouter(prefix="/positions", tags=["positions"])
 
 
 # 특정 직원의 한달 포지션 조회
 @router.get("/position-month/{employee_id}/{year}/{month}", response_model=schemas.PositionsEmployeeMonth)
-def get_employee_month_positions(
+async def get_employee_month_positions(
     employee_id: int,
-    year: int,
-    month: int,
-    db: Session = Depends(get_db)
+    year: YearPath,
+    month: MonthPath,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.get_employee_positions_by_month(db, year, month, employee_id)
+    not_modified = conditional(request, response, month_etag("positions", year, month))
+    if not_modified:
+        return not_modified
+    # crud 결과가 이미 응답 모양이므로 response_model 검증 없이 직렬화 (response_model 은 문서용)
+    return fast_json(await crud.aio.get_employee_positions_by_month(db, year, month, employee_id), response)
 
 
 # 특정 직원의 한달 포지션 수정
 @router.post("/position-month/")
-def upsert_employee_month(positions: schemas.PositionsEmployeeMonth, db: Session = Depends(get_db)):
-    crud.upsert_employee_month_positions(
+async def upsert_employee_month(positions: schemas.PositionsEmployeeMonth, db: AsyncSession = Depends(get_async_db)):
+    await crud.aio.upsert_employee_month_positions(
         db,
         employee_id=positions.employee_id,
         year=positions.year,
         month=positions.month,
-        positions=positions.positions
+        month_positions=positions.positions
     )
     return {"message": "해당 직원의 한 달 포지션이 업데이트되었습니다."}
 
 
 # 전체 직원의 한달 포지션 조회
 @router.post("/month", response_model=schemas.PositionsEmployeeMonthResponse)
-def read_month_positions(req: schemas.MonthDayOffRequest, db: Session = Depends(get_db)):
-    positions = crud.get_positions_by_month(db, req.year, req.month)
-    return {"positions": positions}
+async def read_month_positions(req: schemas.MonthDayOffRequest, request: Request, response: Response,
+                               db: AsyncSession = Depends(get_async_db)):
+    not_modified = conditional(request, response, month_etag("positions", req.year, req.month))
+    if not_modified:
+        return not_modified
+    positions = await crud.aio.get_positions_by_month(db, req.year, req.month)
+    return fast_json({"positions": positions}, response)
@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+from collections import defaultdict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+import crud, schemas
+from database import get_async_db
+from .params import YearPath, MonthPath
+
+router = APIRouter(prefix="/roster", tags=["roster"])
+
+CSV_HEADER = ["employee_id", "name", "date", "kind", "position"]
+
+
+def parse_csv_roster(body: bytes):
+    # employee_id,name,date,kind,position (kind: dayoff | position)
+    employees = defaultdict(lambda: {"dayoffs": [], "positions": []})
+    reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+    for line_no, row in enumerate(reader, start=2):
+        try:
+            employee = employees[int(row["employee_id"])]
+            kind = (row.get("kind") or "").strip()
+            if kind == "dayoff":
+                employee["dayoffs"].append(row["date"].strip())
+            elif kind == "position":
+                employee["positions"].append({"date": row["date"].strip(), "position": row["position"].strip()})
+            elif kind:
+                raise ValueError(f"알 수 없는 kind: {kind}")
+        except (KeyError, ValueError, AttributeError) as e:
+            raise HTTPException(status_code=400, detail=f"CSV {line_no}번째 줄 오류: {e}")
+    return [{"employee_id": e_id, **values} for e_id, values in employees.items()]
+
+
+# 한 달 근무표 일괄 등록 (JSON 또는 CSV)
+@router.post("/{year}/{month}")
+async def import_month(year: YearPath, month: MonthPath, request: Request, db: AsyncSession = Depends(get_async_db)):
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        if content_type.startswith("text/csv"):
+            data = {"employees": parse_csv_roster(body)}
+        else:
+            data = json.loads(body)
+        req = schemas.RosterImportRequest(**data)
+    except (ValueError, TypeError) as e:
+        detail = e.errors() if isinstance(e, ValidationError) else str(e)
+        raise HTTPException(status_code=422, detail=detail)
+
+    return await crud.aio.import_roster_month(db, year, month, req.employees)
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for row in rows:
+        writer.writerow([row[0], row[1], row[2].isoformat(), row[3], row[4]])
+        if buffer.tell() > 8192:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_json(rows):
+    grouped = {}
+    for employee_id, name, day, kind, position in rows:
+        employee = grouped.setdefault(employee_id, {"employee_id": employee_id, "name": name,
+                                                    "dayoffs": [], "positions": []})
+        if kind == "dayoff":
+            employee["dayoffs"].append(day.isoformat())
+        else:
+            employee["positions"].append({"date": day.isoformat(), "position": position})
+
+    yield '{"employees": ['
+    for idx, employee in enumerate(grouped.values()):
+        yield ("," if idx else "") + json.dumps(employee, ensure_ascii=False)
+    yield "]}"
+
+
+# 한 달 근무표 내보내기 (등록과 같은 형식)
+@router.get("/{year}/{month}/export")
+async def export_month(year: YearPath, month: MonthPath, format: str = Query("csv", pattern="^(csv|json)$"),
+                       db: AsyncSession = Depends(get_async_db)):
+    rows = await crud.aio.export_roster_month(db, year, month)
+    filename = f"roster_{year}_{month:02d}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if format == "json":
+        return StreamingResponse(iter_json(rows), media_type="application/json", headers=headers)
+    return StreamingResponse(iter_csv(rows), media_type="text/csv; charset=utf-8", headers=headers)
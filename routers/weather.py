@@ -0,0 +1,45 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from weather_fetch import (
+    NX, NY, GRID_X_MAX, GRID_Y_MAX, latlon_to_grid, fetch_weather_json_async, fetch_timeline_async, present_weather
+)
+
+router = APIRouter(prefix="/api/weather", tags=["weather"])
+
+
+def resolve_grid(nx, ny, lat, lon):
+    # 격자(nx, ny) 또는 위경도(lat, lon), 생략하면 기본 위치
+    if (nx is None) != (ny is None) or (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="nx/ny 또는 lat/lon 을 함께 입력해야 합니다.")
+    if nx is None and lat is not None:
+        nx, ny = latlon_to_grid(lat, lon)
+        if not (1 <= nx <= GRID_X_MAX and 1 <= ny <= GRID_Y_MAX):
+            raise HTTPException(status_code=400, detail="예보 격자 범위를 벗어난 위치입니다.")
+    if nx is None:
+        nx, ny = NX, NY
+    return nx, ny
+
+
+# 초단기예보 4시간 (같은 격자는 발표 시각마다 한 번만 가져옴)
+@router.get("")
+async def get_weather(
+    nx: Optional[int] = Query(None, ge=1, le=GRID_X_MAX),
+    ny: Optional[int] = Query(None, ge=1, le=GRID_Y_MAX),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180)
+):
+    nx, ny = resolve_grid(nx, ny, lat, lon)
+    return {"nx": nx, "ny": ny, "weather": present_weather(await fetch_weather_json_async(nx, ny))}
+
+
+# 초단기 + 단기예보를 합친 내일 오전까지의 시간별 예보
+@router.get("/timeline")
+async def get_timeline(
+    nx: Optional[int] = Query(None, ge=1, le=GRID_X_MAX),
+    ny: Optional[int] = Query(None, ge=1, le=GRID_Y_MAX),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180)
+):
+    nx, ny = resolve_grid(nx, ny, lat, lon)
+    return {"nx": nx, "ny": ny, "timeline": await fetch_timeline_async(nx, ny)}
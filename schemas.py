@@ -1,7 +1,12 @@
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
 from datetime import date
 
+# 월 단위 조회/수정의 연, 월 (month_range 가 date 로 만들 수 있는 범위만 허용 -> 벗어나면 422)
+Year = Annotated[int, Field(ge=1, le=9998)]
+Month = Annotated[int, Field(ge=1, le=12)]
+
 
 class EmployeeBase(BaseModel):
     name: str
@@ -41,14 +46,14 @@ class EmployeeNamesResponse(BaseModel):
 
 class EmployeeMonthDayOff(BaseModel):
     employee_id: int
-    year: int
-    month: int
+    year: Year
+    month: Month
     dates: List[date]
 
 
 class MonthDayOffRequest(BaseModel):
-    year: int
-    month: int
+    year: Year
+    month: Month
 
 
 class DayOff(BaseModel):
@@ -77,8 +82,8 @@ class Positions(BaseModel):
 
 class PositionsEmployeeMonth(BaseModel):
     employee_id: int
-    year: int
-    month: int
+    year: Year
+    month: Month
     positions: List[Positions]
 
 
@@ -120,6 +125,32 @@ class EmployeeOrderResponse(BaseModel):
 
 
 class EmployeeWorkIntersectionRequest(BaseModel):
-    year: int
-    month: int
-    names: List[str]
\ No newline at end of file
+    year: Year
+    month: Month
+    names: List[str]
+
+
+class RosterPosition(BaseModel):
+    date: date  # 잘못된 날짜는 요청 검증에서 422
+    position: str
+
+
+class RosterEmployee(BaseModel):
+    employee_id: int
+    dayoffs: List[date] = []
+    positions: List[RosterPosition] = []
+
+
+class RosterImportRequest(BaseModel):
+    employees: List[RosterEmployee]
+
+
+class WorkAvailabilityRequest(BaseModel):
+    start: date
+    end: date
+    names: List[str]
+    min_count: Optional[int] = None  # 없으면 모두 근무하는 날
+
+
+class BusArrivalsRequest(BaseModel):
+    targets: List[str]
@@ -0,0 +1,144 @@
+import json
+import os
+import sqlite3
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 워커 간 공유 저장소 (외부 API 응답 캐시)
+# - memory: 단일 프로세스 (기본값)
+# - sqlite: 같은 호스트의 여러 워커가 하나의 파일을 공유 (WEB_CONCURRENCY > 1 이면 기본값)
+# 여러 호스트로 실행하면 호스트마다 따로 캐시함 (upstream 조회만 늘어남).
+# 근무표 캐시 무효화 카운터는 여기가 아니라 DATABASE_URL 의 DB 에 있음 (crud.versions)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+SHARED_STORE = os.getenv("SHARED_STORE", "sqlite" if WEB_CONCURRENCY > 1 else "memory")
+SHARED_STORE_PATH = os.getenv("SHARED_STORE_PATH", "./data/shared.db")
+SHARED_STORE_TIMEOUT = 5  # 잠금 대기 시간(초)
+# 저장 형식 버전: 값의 형식이 바뀌면 올림 (키 앞에 붙여 이전 형식의 값은 읽지 않고 기동 시 삭제)
+# 2: 버스/날씨 값을 record_type 레코드로 저장
+STORE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,        -- JSON
+    timestamp REAL NOT NULL     -- 값을 가져온 시각 (epoch 초)
+);
+"""
+
+
+# 공유 저장소에 JSON 으로 저장할 수 있는 __slots__ 레코드 타입
+_record_types = {}
+
+
+def record_type(cls):
+    # 데코레이터: {"__record__": 이름, "fields": [...]} 형태로 저장 / 복원
+    _record_types[cls.__name__] = cls
+    return cls
+
+
+def _encode(obj):
+    cls = _record_types.get(type(obj).__name__)
+    if cls is not type(obj):
+        raise TypeError(f"JSON 으로 저장할 수 없는 값: {type(obj).__name__}")
+    return {"__record__": cls.__name__, "fields": [getattr(obj, name) for name in cls.__slots__]}
+
+
+def _decode(value):
+    cls = _record_types.get(value.get("__record__"))
+    return cls(*value["fields"]) if cls is not None else value
+
+
+class MemoryStore:
+    """프로세스 안에서만 공유되는 저장소 (단일 워커 / 테스트용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        # (value, timestamp), 없으면 None
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, value, timestamp):
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or current[1] <= timestamp:
+                self._entries[key] = (value, timestamp)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def prune(self, prefix, before):
+        # prefix 로 시작하고 before(epoch 초) 이전에 저장된 값 삭제
+        with self._lock:
+            for key in [k for k, (_, ts) in self._entries.items() if k.startswith(prefix) and ts < before]:
+                del self._entries[key]
+
+
+class SqliteStore:
+    """
+    같은 호스트의 여러 프로세스가 공유하는 SQLite 파일 저장소 (WAL).
+    값은 JSON 으로 저장하고, 스레드마다 커넥션을 하나씩 사용.
+    키에는 STORE_VERSION 을 붙여 배포 전 형식의 값을 읽지 않음.
+    """
+
+    def __init__(self, path=SHARED_STORE_PATH):
+        self.path = path
+        self.prefix = f"v{STORE_VERSION}:"
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.execute("DELETE FROM entries WHERE substr(key, 1, ?) != ?", (len(self.prefix), self.prefix))
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SHARED_STORE_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value, timestamp FROM entries WHERE key = ?", (self.prefix + key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0], object_hook=_decode), row[1]
+
+    def set(self, key, value, timestamp):
+        # 더 최근 값만 덮어씀 (늦게 끝난 fetch 가 새 값을 되돌리지 않도록)
+        self._conn().execute(
+            "INSERT INTO entries (key, value, timestamp) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, timestamp = excluded.timestamp "
+            "WHERE excluded.timestamp >= entries.timestamp",
+            (self.prefix + key, json.dumps(value, ensure_ascii=False, default=_encode), timestamp)
+        )
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (self.prefix + key,))
+
+    def prune(self, prefix, before):
+        self._conn().execute(
+            "DELETE FROM entries WHERE substr(key, 1, ?) = ? AND timestamp < ?",
+            (len(self.prefix + prefix), self.prefix + prefix, before)
+        )
+
+
+def create_store(kind=SHARED_STORE):
+    if kind == "memory":
+        return MemoryStore()
+    if kind == "sqlite":
+        return SqliteStore()
+    raise ValueError(f"알 수 없는 SHARED_STORE: {kind}")
+
+
+shared_store = create_store()
+
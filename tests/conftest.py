@@ -0,0 +1,97 @@
+"""
+crud 테스트용 DB fixture: 같은 테스트를 SQLite / PostgreSQL 에서 각각 실행.
+
+PostgreSQL 은 다음 중 하나가 있을 때만 실행 (없으면 skip)
+- TEST_POSTGRES_URL: 이미 떠 있는 서버 (예: docker run -e POSTGRES_PASSWORD=pw -p 5432:5432 postgres:16
+  -> postgresql://postgres:pw@localhost:5432/postgres)
+- pytest-postgresql + PostgreSQL 바이너리(pg_ctl): 테스트 세션 동안 임시 서버를 띄움
+- pgserver (PostgreSQL 바이너리를 포함한 pip 패키지): 위 둘이 없을 때 임시 서버를 띄움
+"""
+import os
+import tempfile
+
+import pytest
+
+# 앱 모듈은 import 시 DATABASE_URL 로 엔진을 만들므로 먼저 임시 SQLite 로 지정 (테스트마다 다시 연결)
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "import.db")
+
+from sqlalchemy import create_engine  # noqa: E402
+
+import database  # noqa: E402
+import models  # noqa: E402
+from crud import roster_cache  # noqa: E402
+from crud.availability import availability_index  # noqa: E402
+from crud.versions import load_shared_versions  # noqa: E402
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+NO_POSTGRES = "PostgreSQL 없음 (TEST_POSTGRES_URL, pytest-postgresql + pg_ctl 또는 pgserver 필요)"
+
+
+@pytest.fixture(scope="session")
+def postgres_url(request):
+    if TEST_POSTGRES_URL:
+        yield TEST_POSTGRES_URL
+        return
+    try:
+        from pytest_postgresql.exceptions import ExecutableMissingException
+        from pytest_postgresql.janitor import DatabaseJanitor
+    except ImportError:
+        yield from pgserver_url()
+        return
+    try:
+        proc = request.getfixturevalue("postgresql_proc")
+    except ExecutableMissingException:
+        yield from pgserver_url()
+        return
+
+    dbname = "commutemate_test"
+    with DatabaseJanitor(user=proc.user, host=proc.host, port=proc.port, version=proc.version,
+                         dbname=dbname, password=proc.password):
+        yield f"postgresql://{proc.user}:{proc.password or ''}@{proc.host}:{proc.port}/{dbname}"
+
+
+def pgserver_url():
+    try:
+        import pgserver
+    except ImportError:
+        pytest.skip(NO_POSTGRES)
+    server = pgserver.get_server(tempfile.mkdtemp(), cleanup_mode="stop")
+    try:
+        yield server.get_uri()
+    finally:
+        server.cleanup()
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def database_url(request, tmp_path):
+    if request.param == "sqlite":
+        return f"sqlite:///{tmp_path / 'test.db'}"
+    return request.getfixturevalue("postgres_url")
+
+
+@pytest.fixture
+def engine(database_url, monkeypatch):
+    # 앱이 쓰는 엔진 / 세션을 테스트 DB 로 교체하고 빈 테이블에서 시작
+    engine = create_engine(database_url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    original_bind = database.SessionLocal.kw["bind"]
+    monkeypatch.setattr(database, "engine", engine)
+    database.SessionLocal.configure(bind=engine)
+
+    # 이전 테스트의 메모리 캐시를 비우고 새 DB 의 공유 버전에서 시작 (main 기동과 같음)
+    roster_cache.invalidate_all()
+    availability_index.invalidate()
+    load_shared_versions(engine)
+
+    yield engine
+
+    database.SessionLocal.configure(bind=original_bind)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with database.SessionLocal() as session:
+        yield session
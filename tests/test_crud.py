@@ -0,0 +1,166 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, inspect, insert, select, text
+
+import crud
+import database
+import models
+import schemas
+from crud.availability import ALWAYS_INCLUDED
+
+
+def add_employees(db, *names):
+    for name in names:
+        crud.create_employee(db, schemas.EmployeeCreateAndUpdate(name=name))
+    return {e.name: e.id for e in db.query(models.Employee)}
+
+
+def dayoff_rows(db):
+    return sorted(
+        (r.employee_id, r.date, r.order)
+        for r in db.query(models.DayOff.employee_id, models.DayOff.date, models.DayOff.order)
+    )
+
+
+def roster(employee_id, dayoffs=(), positions=()):
+    return schemas.RosterEmployee(
+        employee_id=employee_id,
+        dayoffs=list(dayoffs),
+        positions=[schemas.RosterPosition(date=d, position=p) for d, p in positions],
+    )
+
+
+def test_month_reads(db):
+    ids = add_employees(db, "가", "나")
+    crud.upsert_employee_month_dayoffs(db, ids["가"], [date(2026, 10, 5), date(2026, 10, 1)], 2026, 10)
+    crud.upsert_employee_month_dayoffs(db, ids["나"], [date(2026, 10, 2)], 2026, 10)
+    crud.upsert_employee_month_positions(db, ids["나"], 2026, 10, [schemas.Positions(date="2026-10-03", position="오픈")])
+
+    dayoffs = crud.get_dayoffs_by_month(db, 2026, 10)
+    assert [(d["employee_id"], d["name"], d["date"], d["order"]) for d in dayoffs] == [
+        (ids["가"], "가", "2026-10-01", 1),
+        (ids["나"], "나", "2026-10-02", 1),
+        (ids["가"], "가", "2026-10-05", 2),
+    ]
+    positions = crud.get_positions_by_month(db, 2026, 10)
+    assert [(p["employee_id"], p["positions"]) for p in positions] == [
+        (ids["나"], [{"date": "2026-10-03", "position": "오픈"}]),
+    ]
+    assert crud.get_dayoffs_by_month(db, 2026, 11) == []
+
+    # 쓰기 후에는 캐시가 아닌 새 값
+    crud.upsert_employee_month_dayoffs(db, ids["나"], [], 2026, 10)
+    assert [d["name"] for d in crud.get_dayoffs_by_month(db, 2026, 10)] == ["가", "가"]
+
+
+def test_upsert_on_conflict(db):
+    ids = add_employees(db, "가")
+    e_id = ids["가"]
+
+    crud.upsert_employee_month_dayoffs(db, e_id, [date(2026, 10, 3), date(2026, 10, 1)], 2026, 10)
+    assert dayoff_rows(db) == [(e_id, date(2026, 10, 1), 1), (e_id, date(2026, 10, 3), 2)]
+
+    # 같은 (직원, 날짜) 는 새 행 없이 순서만 갱신, 빠진 날짜는 삭제
+    crud.upsert_employee_month_dayoffs(db, e_id, [date(2026, 10, 2), date(2026, 10, 3)], 2026, 10)
+    assert dayoff_rows(db) == [(e_id, date(2026, 10, 2), 1), (e_id, date(2026, 10, 3), 2)]
+
+    crud.upsert_employee_month_positions(db, e_id, 2026, 10, [schemas.Positions(date="2026-10-07", position="오픈")])
+    crud.upsert_employee_month_positions(db, e_id, 2026, 10, [schemas.Positions(date="2026-10-07", position="마감")])
+    assert [(p.date, p.position) for p in db.query(models.SpecialPosition)] == [(date(2026, 10, 7), "마감")]
+
+
+def test_dedupe_employee_dates(db, engine):
+    ids = add_employees(db, "가")
+    e_id = ids["가"]
+
+    # 유니크 인덱스가 없던 예전 스키마로 되돌리고 중복 행 추가
+    with engine.begin() as conn:
+        for table in ("day_offs", "special_positions"):
+            conn.execute(text(f"DROP INDEX uq_{table}_employee_id_date"))
+            conn.execute(text(f"CREATE INDEX ix_{table}_employee_id_date ON {table} (employee_id, date)"))
+        conn.execute(insert(models.DayOff), [
+            {"employee_id": e_id, "date": date(2026, 10, 1), "order": 1},
+            {"employee_id": e_id, "date": date(2026, 10, 1), "order": 2},
+            {"employee_id": e_id, "date": date(2026, 10, 2), "order": 3},
+        ])
+        conn.execute(insert(models.SpecialPosition), [
+            {"employee_id": e_id, "date": date(2026, 10, 1), "position": "오픈"},
+            {"employee_id": e_id, "date": date(2026, 10, 1), "position": "마감"},
+        ])
+
+    database.dedupe_employee_dates()
+    database.create_missing_indexes()
+
+    # 중복 중 마지막(id 가 큰) 행만 남음
+    assert dayoff_rows(db) == [(e_id, date(2026, 10, 1), 2), (e_id, date(2026, 10, 2), 3)]
+    assert [p.position for p in db.query(models.SpecialPosition)] == ["마감"]
+
+    inspector = inspect(engine)
+    for table in ("day_offs", "special_positions"):
+        names = {i["name"] for i in inspector.get_indexes(table)}
+        assert f"uq_{table}_employee_id_date" in names
+        assert f"ix_{table}_employee_id_date" not in names
+
+    # 이미 유니크 인덱스가 있으면 아무것도 하지 않음
+    database.dedupe_employee_dates()
+    assert db.scalar(select(func.count()).select_from(models.DayOff)) == 2
+
+
+def test_roster_import_export(db):
+    ids = add_employees(db, "가", "나")
+    month = [
+        roster(ids["가"], dayoffs=[date(2026, 10, 1), date(2026, 10, 8)]),
+        roster(ids["나"], dayoffs=[date(2026, 10, 2)], positions=[(date(2026, 10, 3), "오픈")]),
+    ]
+
+    result = crud.import_roster_month(db, 2026, 10, month)
+    assert result == {"dayoffs": {"inserted": 3, "updated": 0, "deleted": 0},
+                      "positions": {"inserted": 1, "updated": 0, "deleted": 0}}
+    assert crud.export_roster_month(db, 2026, 10) == [
+        (ids["가"], "가", date(2026, 10, 1), "dayoff", ""),
+        (ids["가"], "가", date(2026, 10, 8), "dayoff", ""),
+        (ids["나"], "나", date(2026, 10, 2), "dayoff", ""),
+        (ids["나"], "나", date(2026, 10, 3), "position", "오픈"),
+    ]
+
+    # 같은 내용은 변경 없음, 바뀐 행만 반영
+    assert crud.import_roster_month(db, 2026, 10, month)["dayoffs"] == {"inserted": 0, "updated": 0, "deleted": 0}
+    result = crud.import_roster_month(db, 2026, 10, [
+        roster(ids["가"], dayoffs=[date(2026, 10, 8)]),
+        roster(ids["나"], dayoffs=[date(2026, 10, 2)], positions=[(date(2026, 10, 3), "마감")]),
+    ])
+    assert result == {"dayoffs": {"inserted": 0, "updated": 1, "deleted": 1},
+                      "positions": {"inserted": 0, "updated": 1, "deleted": 0}}
+    assert [d["date"] for d in crud.get_dayoffs_by_month(db, 2026, 10) if d["name"] == "가"] == ["2026-10-08"]
+
+
+def test_roster_import_rejects_other_month(db):
+    ids = add_employees(db, "가")
+    with pytest.raises(HTTPException) as exc:
+        crud.import_roster_month(db, 2026, 10, [roster(ids["가"], dayoffs=[date(2026, 11, 1)])])
+    assert exc.value.status_code == 400
+    assert dayoff_rows(db) == []
+
+
+def test_availability(db):
+    ids = add_employees(db, "가", "나", ALWAYS_INCLUDED)
+    crud.upsert_employee_month_dayoffs(db, ids["가"], [date(2026, 10, 1), date(2026, 10, 2)], 2026, 10)
+    crud.upsert_employee_month_dayoffs(db, ids["나"], [date(2026, 10, 2), date(2026, 10, 3)], 2026, 10)
+    crud.upsert_employee_month_dayoffs(db, ids[ALWAYS_INCLUDED], [date(2026, 10, 4)], 2026, 10)
+
+    start, end = date(2026, 10, 1), date(2026, 10, 5)
+    assert crud.all_working_days(db, ["가", "나"], start, end) == ["2026-10-04", "2026-10-05"]
+    assert crud.at_least_k_working_days(db, ["가", "나", ALWAYS_INCLUDED], start, end, 2) == [
+        {"date": "2026-10-01", "count": 2},
+        {"date": "2026-10-03", "count": 2},
+        {"date": "2026-10-04", "count": 2},
+        {"date": "2026-10-05", "count": 3},
+    ]
+    intersection = crud.get_work_intersection(db, 2026, 10, ["가", "나"])["dates"]
+    assert intersection[:2] == ["2026-10-05", "2026-10-06"]
+
+    # 휴무가 바뀌면 해당 직원 마스크를 다시 읽음
+    crud.upsert_employee_month_dayoffs(db, ids["가"], [], 2026, 10)
+    assert crud.all_working_days(db, ["가", "나"], start, end) == ["2026-10-01", "2026-10-04", "2026-10-05"]
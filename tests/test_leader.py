@@ -0,0 +1,28 @@
+from leader import AdvisoryLeaderLock, LeaderLock, create_leader_lock
+
+
+def make_lock(engine, tmp_path):
+    # PostgreSQL 은 advisory lock (모든 호스트), SQLite 는 파일 잠금 (한 호스트)
+    if engine.dialect.name == "postgresql":
+        return AdvisoryLeaderLock(engine)
+    return LeaderLock(str(tmp_path / "scheduler.lock"))
+
+
+def test_create_leader_lock(engine):
+    lock = create_leader_lock(engine)
+    assert isinstance(lock, AdvisoryLeaderLock) == (engine.dialect.name == "postgresql")
+
+
+def test_single_leader(engine, tmp_path):
+    first, second = make_lock(engine, tmp_path), make_lock(engine, tmp_path)
+    try:
+        assert first.try_acquire()
+        assert not second.try_acquire()
+        assert first.is_leader and not second.is_leader
+
+        # 리더가 물러나면 다른 프로세스가 이어받음
+        first.release()
+        assert second.try_acquire()
+    finally:
+        first.release()
+        second.release()
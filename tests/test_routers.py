@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import database
+import main
+import models
+
+CONCURRENCY = 10
+
+
+async def with_client(database_url, run):
+    # 라우터 -> crud.aio(run_sync) -> async 세션 경로를 테스트 DB 로 실행 (엔진은 이 이벤트 루프에서 생성)
+    async_engine = create_async_engine(database.to_async_url(database_url))
+    if async_engine.dialect.name == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", database.set_sqlite_pragmas)
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_async_db():
+        async with sessions() as db:
+            yield db
+
+    main.app.dependency_overrides[database.get_async_db] = get_async_db
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await run(client)
+    finally:
+        main.app.dependency_overrides.pop(database.get_async_db, None)
+        await async_engine.dispose()
+
+
+def test_concurrent_dayoff_upserts(db, database_url):
+    async def run(client):
+        for i in range(CONCURRENCY):
+            assert (await client.post("/employees/", json={"name": f"직원{i}"})).status_code == 201
+        ids = [e.id for e in db.query(models.Employee).order_by(models.Employee.id)]
+
+        month = await client.post("/dayoffs/month", json={"year": 2026, "month": 10})
+        etag = month.headers["etag"]
+
+        # 서로 다른 직원의 휴무를 동시에 저장 (데이터 / 공유 버전이 같은 트랜잭션)
+        responses = await asyncio.gather(*[
+            client.post("/dayoffs/dayoff-month/", json={
+                "employee_id": e_id, "year": 2026, "month": 10,
+                "dates": ["2026-10-01", f"2026-10-{i + 2:02d}"],
+            })
+            for i, e_id in enumerate(ids)
+        ])
+        assert [r.status_code for r in responses] == [200] * CONCURRENCY
+
+        month = await client.post("/dayoffs/month", json={"year": 2026, "month": 10},
+                                  headers={"If-None-Match": etag})
+        assert month.status_code == 200
+        assert month.headers["etag"] != etag
+        assert len(month.json()["dayoffs"]) == 2 * CONCURRENCY
+
+        # 바뀌지 않았으면 304
+        again = await client.post("/dayoffs/month", json={"year": 2026, "month": 10},
+                                  headers={"If-None-Match": month.headers["etag"]})
+        assert again.status_code == 304
+
+        intersection = await client.post("/dayoffs/work-intersection",
+                                         json={"year": 2026, "month": 10, "names": ["직원0", "직원1"]})
+        assert intersection.status_code == 200
+        assert intersection.json()["dates"][0] == "2026-10-04"
+
+    asyncio.run(with_client(database_url, run))
+    assert db.query(models.DayOff).count() == 2 * CONCURRENCY
+
+
+def test_concurrent_roster_imports(db, database_url):
+    async def run(client):
+        for i in range(CONCURRENCY):
+            await client.post("/employees/", json={"name": f"직원{i}"})
+        ids = [e.id for e in db.query(models.Employee).order_by(models.Employee.id)]
+
+        # 달마다 다른 직원 구성으로 동시에 import
+        responses = await asyncio.gather(*[
+            client.post(f"/roster/2026/{month}", json={"employees": [
+                {"employee_id": ids[month - 1], "dayoffs": [f"2026-{month:02d}-01"],
+                 "positions": [{"date": f"2026-{month:02d}-02", "position": "오픈"}]},
+            ]})
+            for month in range(1, CONCURRENCY + 1)
+        ])
+        assert [r.status_code for r in responses] == [200] * CONCURRENCY
+
+        exported = await client.get("/roster/2026/3/export", params={"format": "json"})
+        assert exported.status_code == 200
+        assert exported.json()["employees"] == [
+            {"employee_id": ids[2], "name": "직원2", "dayoffs": ["2026-03-01"],
+             "positions": [{"date": "2026-03-02", "position": "오픈"}]},
+        ]
+
+    asyncio.run(with_client(database_url, run))
+    assert db.query(models.DayOff).count() == CONCURRENCY
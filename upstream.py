@@ -0,0 +1,157 @@
+import asyncio
+import random
+import threading
+import time
+import logging
+from urllib.parse import urlsplit
+
+import httpx
+
+from metrics import UPSTREAM_DURATION, UPSTREAM_RETRIES
+
+logger = logging.getLogger("uvicorn.error")
+
+MAX_RETRY = 3            # 최대 재시도 횟수
+BACKOFF_BASE = 0.5       # 첫 재시도 대기 상한(초), 시도마다 2배
+BACKOFF_MAX = 8          # 재시도 대기 최대값(초)
+
+MAX_CONNECTIONS = 20     # 전체 커넥션 수
+MAX_KEEPALIVE = 10       # keep-alive 로 유지할 커넥션 수
+KEEPALIVE_EXPIRY = 30    # 유휴 커넥션 유지 시간(초)
+PER_HOST_LIMIT = 4       # 호스트별 동시 요청 수
+
+limits = httpx.Limits(
+    max_connections=MAX_CONNECTIONS,
+    max_keepalive_connections=MAX_KEEPALIVE,
+    keepalive_expiry=KEEPALIVE_EXPIRY,
+)
+
+_async_client = None
+_sync_client = None
+_client_lock = threading.Lock()
+_async_semaphores = {}
+_sync_semaphores = {}
+
+
+def get_async_client():
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(limits=limits)
+    return _async_client
+
+
+def get_sync_client():
+    # 스케줄러/기록용 (스레드에서 호출)
+    global _sync_client
+    with _client_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(limits=limits)
+        return _sync_client
+
+
+async def aclose():
+    global _async_client, _sync_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    with _client_lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+
+
+def backoff_delay(attempt):
+    # exponential backoff + full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _host(url):
+    return urlsplit(url).netloc
+
+
+def _observe(host, start, result):
+    # 재시도 / backoff 대기를 포함한 전체 조회 시간
+    UPSTREAM_DURATION.observe(time.perf_counter() - start, host=host, result=result)
+
+
+def _async_semaphore(url):
+    host = _host(url)
+    sem = _async_semaphores.get(host)
+    if sem is None:
+        sem = _async_semaphores[host] = asyncio.Semaphore(PER_HOST_LIMIT)
+    return sem
+
+
+def _sync_semaphore(url):
+    host = _host(url)
+    with _client_lock:
+        sem = _sync_semaphores.get(host)
+        if sem is None:
+            sem = _sync_semaphores[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return sem
+
+
+async def fetch_async(url, parse, timeout=10, max_retry=MAX_RETRY):
+    """
+    url 을 GET 해서 parse(response) 결과를 반환.
+    200 이 아니거나 parse 결과가 None 이면 backoff 후 재시도하고,
+    끝까지 실패하면 None (네트워크 오류로만 실패했다면 마지막 예외를 다시 던짐).
+    """
+    client = get_async_client()
+    sem = _async_semaphore(url)
+    host = _host(url)
+    start = time.perf_counter()
+    last_error = None
+
+    for attempt in range(max_retry):
+        try:
+            async with sem:
+                response = await client.get(url, timeout=timeout)
+            last_error = None
+            if response.status_code == 200:
+                result = parse(response)
+                if result is not None:
+                    _observe(host, start, "ok")
+                    return result
+        except httpx.TransportError as e:
+            last_error = e
+
+        if attempt < max_retry - 1:
+            UPSTREAM_RETRIES.inc(host=host)
+            await asyncio.sleep(backoff_delay(attempt))
+
+    _observe(host, start, "error" if last_error is not None else "empty")
+    if last_error is not None:
+        raise last_error
+    return None
+
+
+def fetch_sync(url, parse, timeout=10, max_retry=MAX_RETRY):
+    # fetch_async 와 동일한 동작의 동기 버전
+    client = get_sync_client()
+    sem = _sync_semaphore(url)
+    host = _host(url)
+    start = time.perf_counter()
+    last_error = None
+
+    for attempt in range(max_retry):
+        try:
+            with sem:
+                response = client.get(url, timeout=timeout)
+            last_error = None
+            if response.status_code == 200:
+                result = parse(response)
+                if result is not None:
+                    _observe(host, start, "ok")
+                    return result
+        except httpx.TransportError as e:
+            last_error = e
+
+        if attempt < max_retry - 1:
+            UPSTREAM_RETRIES.inc(host=host)
+            time.sleep(backoff_delay(attempt))
+
+    _observe(host, start, "error" if last_error is not None else "empty")
+    if last_error is not None:
+        raise last_error
+    return None
@@ -1,31 +1,43 @@
+import asyncio
+import math
 import os
-import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, NamedTuple, Optional
 
-import requests
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import pytz
 
+from cache import SingleFlightCache
+from shared_store import record_type, shared_store
+from upstream import fetch_async, fetch_sync
+
 kst = pytz.timezone('Asia/Seoul')
 
 load_dotenv()
 AUTHKEY = os.getenv("AUTHKEY")
 NX = 62
 NY = 128
+TIMEOUT = 30  # 요청 타임아웃(초)
+WINDOW_HOURS = 4  # 현재 시각 기준 반환할 시간 수
+TIMELINE_END_HOUR = 12  # 통합 예보는 내일 이 시각까지
 
+# 단기예보 발표 시각 (발표 10분 후부터 조회 가능)
+VILLAGE_BASE_HOURS = (2, 5, 8, 11, 14, 17, 20, 23)
+VILLAGE_DELAY_MINUTES = 10
 
-def get_base_time() -> str:
-    now = datetime.now(kst)
-    hour = now.hour if now.minute > 45 else now.hour - 1
-    return f"{hour:02d}30"
-
+# 기상청 격자 범위
+GRID_X_MAX = 149
+GRID_Y_MAX = 253
 
-def get_base_date() -> str:
-    now = datetime.now(kst)
-    if now.hour == 0 and now.minute < 45:
-        yesterday = now - timedelta(days=1)
-        return f"{yesterday.year}{yesterday.month:02d}{yesterday.day:02d}"
-    return f"{now.year}{now.month:02d}{now.day:02d}"
+# 격자 변환 (기상청 Lambert Conformal Conic, 5km 격자)
+EARTH_RADIUS = 6371.00877
+GRID_KM = 5.0
+SLAT1, SLAT2 = 30.0, 60.0   # 표준 위도
+OLON, OLAT = 126.0, 38.0    # 기준점 경도/위도
+XO, YO = 43, 136            # 기준점 격자 좌표
 
 
 def format_hour(hour: int) -> str:
@@ -34,131 +46,357 @@ def format_hour(hour: int) -> str:
     return f"{period} {hour12}시"
 
 
-def fetch_weather_json():
-    base_time = get_base_time()
-    base_date = get_base_date()
+# ---- 분류 테이블 (모듈 로드 시 한 번만 생성) ----
+
+SKY_LABELS = {'1': '맑음', '3': '구름많음', '4': '흐림'}
+PTY_LABELS = {
+    '0': None,
+    '1': '비', '4': '비', '5': '비',
+    '2': '비+눈', '6': '비+눈',
+    '3': '눈', '7': '눈'
+}
+PTY_CODES = {'비': 7, '비+눈': 8, '눈': 9}
+SKY_CODES = {
+    ('맑음', True): 1,
+    ('맑음', False): 2,
+    ('구름많음', True): 3,
+    ('구름많음', False): 4,
+    ('흐림', True): 5,
+    ('흐림', False): 6
+}
+HOUR_LABELS = tuple(format_hour(h) for h in range(24))  # 예: '오전 5시', '오후 3시'
+IS_NIGHT = tuple(not 5 <= h <= 20 for h in range(24))   # 오전 5시~오후 8시 => 낮
+
+
+def wind_status(wind_speed):
+    if wind_speed is None:
+        return '정보 없음'
+    if wind_speed >= 9:
+        return '강한 바람'
+    if wind_speed >= 4:
+        return '약간 강한 바람'
+    return '약한 바람'
+
+
+@record_type
+@dataclass
+class WeatherHour:
+    """예보 한 시간치 (표시용 문자열은 format_weather_hour 에서 생성)"""
+    __slots__ = ("hour", "sky", "pty", "temperature", "humidity", "precipitation", "wind_speed",
+                 "precipitation_probability")
+    hour: int                                   # 예보 시각 (0~23)
+    sky: Optional[str]                          # SKY 코드
+    pty: Optional[str]                          # PTY 코드
+    temperature: Optional[float]                # 기온 (℃)
+    humidity: Optional[int]                     # 습도 (%)
+    precipitation: Optional[str]                # 강수량 (범주형 문자열, 예: "1mm 미만")
+    wind_speed: Optional[float]                 # 풍속 (m/s)
+    precipitation_probability: Optional[int]    # 강수확률 (%), 단기예보만
+
+
+def _number(value, cast=float):
+    try:
+        return cast(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def to_weather_hour(hour: int, data: dict):
+    return WeatherHour(
+        hour=hour,
+        sky=data.get('SKY'),
+        pty=data.get('PTY'),
+        temperature=_number(data.get('T1H')),
+        humidity=_number(data.get('REH'), int),
+        precipitation=data.get('RN1'),
+        wind_speed=_number(data.get('WSD')),
+        precipitation_probability=_number(data.get('POP'), int),
+    )
+
+
+def _format_number(value):
+    # 21.0 -> "21", 21.5 -> "21.5"
+    return f"{value:g}" if value is not None else '0'
+
+
+def format_weather_hour(record: WeatherHour):
+    # 응답용 표시 문자열 (표시 시각은 예보 시각의 한 시간 전)
+    display = (record.hour - 1) % 24
+    sky = SKY_LABELS.get(record.sky or '1', '정보없음')
+    pty = PTY_LABELS.get(record.pty or '0')
+    result = {
+        "time": HOUR_LABELS[display],
+        "sky": sky,
+        "temp": _format_number(record.temperature),
+        "humidity": _format_number(record.humidity),
+        "precipitation_type": pty if pty else '없음',
+        "precipitation_amount": record.precipitation or '강수없음',
+        "sky_code": PTY_CODES[pty] if pty else SKY_CODES.get((sky, IS_NIGHT[display]), 0),
+        "wind": wind_status(record.wind_speed)
+    }
+    if record.precipitation_probability is not None:
+        result["precipitation_probability"] = str(record.precipitation_probability)
+    return result
+
+
+def present_weather(weather):
+    # fetch_weather_json 결과 -> 응답 (실패 시 오류 dict 그대로)
+    if isinstance(weather, dict):
+        return weather
+    return [format_weather_hour(record) for record in weather]
+
+
+EMPTY_RECORDS = tuple(to_weather_hour(h, {}) for h in range(24))  # 예보가 없는 시간의 기본값
+
+
+# ---- 격자 / 발표 시각 ----
+
+def _lcc_constants():
+    degrad = math.pi / 180
+    re = EARTH_RADIUS / GRID_KM
+    slat1, slat2 = SLAT1 * degrad, SLAT2 * degrad
+    olat = OLAT * degrad
+    sn = math.log(math.cos(slat1) / math.cos(slat2)) / \
+        math.log(math.tan(math.pi * 0.25 + slat2 * 0.5) / math.tan(math.pi * 0.25 + slat1 * 0.5))
+    sf = math.tan(math.pi * 0.25 + slat1 * 0.5) ** sn * math.cos(slat1) / sn
+    ro = re * sf / math.tan(math.pi * 0.25 + olat * 0.5) ** sn
+    return re, sn, sf, ro
+
+
+LCC_RE, LCC_SN, LCC_SF, LCC_RO = _lcc_constants()
+
+
+def latlon_to_grid(lat: float, lon: float):
+    # 위경도 -> 기상청 예보 격자 (nx, ny)
+    degrad = math.pi / 180
+    ra = LCC_RE * LCC_SF / math.tan(math.pi * 0.25 + lat * degrad * 0.5) ** LCC_SN
+    theta = lon * degrad - OLON * degrad
+    if theta > math.pi:
+        theta -= 2 * math.pi
+    if theta < -math.pi:
+        theta += 2 * math.pi
+    theta *= LCC_SN
+    nx = math.floor(ra * math.sin(theta) + XO + 0.5)
+    ny = math.floor(LCC_RO - ra * math.cos(theta) + YO + 0.5)
+    return nx, ny
+
+
+def get_base(now=None):
+    # 초단기예보는 매시 30분 발표, 45분 이후 조회 가능 -> 그 전에는 이전 시각 발표분
+    now = now or datetime.now(kst)
+    base = now if now.minute > 45 else now - timedelta(hours=1)
+    return base.strftime("%Y%m%d"), f"{base.hour:02d}30"
+
+
+def get_village_base(now=None):
+    # 단기예보는 하루 8번 (02시부터 3시간 간격) 발표 -> 조회 가능한 가장 최근 발표분
+    now = now or datetime.now(kst)
+    available = now - timedelta(minutes=VILLAGE_DELAY_MINUTES)
+    hours = [h for h in VILLAGE_BASE_HOURS if h <= available.hour]
+    if not hours:
+        available -= timedelta(days=1)
+        hours = VILLAGE_BASE_HOURS
+    return available.strftime("%Y%m%d"), f"{hours[-1]:02d}00"
 
-    url = (
-        f"https://apihub.kma.go.kr/api/typ02/openApi/VilageFcstInfoService_2.0/getUltraSrtFcst"
-        f"?pageNo=1&numOfRows=60&dataType=JSON"
+
+class Product(NamedTuple):
+    name: str                   # 캐시 키 접두사
+    operation: str              # API 이름
+    num_of_rows: int
+    get_base: Callable          # now -> (base_date, base_time)
+    expiration: int             # 한 발표분을 유지할 시간(초), 다음 발표가 나오면 키가 바뀜
+    renames: Dict[str, str]     # 초단기예보 항목 이름으로 맞춤
+
+
+ULTRA = Product("ultra", "getUltraSrtFcst", 60, get_base, 3 * 3600, {})  # 10개 항목 x 6시간
+VILLAGE = Product("village", "getVilageFcst", 1000, get_village_base, 6 * 3600,
+                  {"TMP": "T1H", "PCP": "RN1"})  # 3일치, 한 페이지 최대 행 수
+
+
+def get_weather_url(nx=NX, ny=NY, base_date=None, base_time=None, product=ULTRA):
+    if base_date is None or base_time is None:
+        base_date, base_time = product.get_base()
+
+    return (
+        f"https://apihub.kma.go.kr/api/typ02/openApi/VilageFcstInfoService_2.0/{product.operation}"
+        f"?pageNo=1&numOfRows={product.num_of_rows}&dataType=JSON"
         f"&base_date={base_date}&base_time={base_time}"
-        f"&nx={NX}&ny={NY}"
+        f"&nx={nx}&ny={ny}"
         f"&authKey={AUTHKEY}"
     )
 
-    response = requests.get(url, timeout=30)
-    if response.status_code != 200:
-        return {"error": f"API 요청 실패: {response.status_code}"}
 
-    items = response.json()['response']['body']['items']['item']
+def parse_items(response):
+    return response.json()['response']['body']['items']['item']
+
+
+# ---- 예보 캐시: (예보 종류, 격자, 발표 시각) 별로 한 번만 가져와서 분류까지 끝낸 표를 보관 ----
+
+forecast_cache = SingleFlightCache("forecast", store=shared_store)
+_current_keys = {}  # (예보 종류, nx, ny) -> 마지막으로 가져온 발표 시각의 캐시 키
+_keys_lock = threading.Lock()
+
+# 한 번만 조회된 격자의 발표분은 다음 발표로 교체되지 않으므로 오래된 키를 주기적으로 정리
+# (발표분 유지 시간의 2배 동안 갱신되지 않은 키 삭제)
+PRUNED_PRODUCTS = (ULTRA, VILLAGE)
+PRUNE_INTERVAL = 600            # 정리 주기(초), 워커마다 요청 경로에서 실행
+_last_prune = 0.0
+
 
-    # 시간별 데이터 정리
+def forecast_key(product, nx, ny, base_date, base_time):
+    return f"weather:{product.name}:{nx}:{ny}:{base_date}{base_time}"
+
+
+def build_forecast(items, renames=None):
+    # 예보 일시(YYYYMMDDHHMM) -> WeatherHour
+    renames = renames or {}
     weather_by_time = {}
     for item in items:
-        time = item['fcstTime']
-        category = item['category']
-        value = item['fcstValue']
-        if time not in weather_by_time:
-            weather_by_time[time] = {}
-        weather_by_time[time][category] = value
-
-    # 현재 시각 기준으로 4시간치 반환
-    now = datetime.now(kst)
-    now_hour = now.hour
+        category = renames.get(item['category'], item['category'])
+        weather_by_time.setdefault(item['fcstDate'] + item['fcstTime'], {})[category] = item['fcstValue']
+    return {key: to_weather_hour(int(key[8:10]), data) for key, data in weather_by_time.items()}
+
+
+def _forecast_fetcher(product, nx, ny, base_date, base_time):
+    url = get_weather_url(nx, ny, base_date, base_time, product)
+
+    def fetch():
+        items = fetch_sync(url, parse_items, timeout=TIMEOUT)
+        if items is None:
+            raise RuntimeError("API 요청 실패")
+        return build_forecast(items, product.renames)
+
+    async def fetch_coro():
+        items = await fetch_async(url, parse_items, timeout=TIMEOUT)
+        if items is None:
+            raise RuntimeError("API 요청 실패")
+        return build_forecast(items, product.renames)
+
+    return fetch, fetch_coro
+
+
+def _promote(grid, key):
+    # 새 발표분을 가져오면 이전 발표분은 정리
+    with _keys_lock:
+        previous = _current_keys.get(grid)
+        _current_keys[grid] = key
+    if previous is not None and previous != key:
+        forecast_cache.discard(previous)
+    _maybe_prune()
+
+
+def _maybe_prune():
+    global _last_prune
+    now = time.time()
+    with _keys_lock:
+        if now - _last_prune < PRUNE_INTERVAL:
+            return
+        _last_prune = now
+    pruned = set()
+    for product in PRUNED_PRODUCTS:
+        pruned.update(forecast_cache.prune(f"weather:{product.name}:", 2 * product.expiration))
+    if pruned:
+        with _keys_lock:
+            for grid in [g for g, k in _current_keys.items() if k in pruned]:
+                del _current_keys[grid]
+
+
+def _fallback(grid):
+    # 새 발표분을 못 가져오면 직전 발표분 사용 (없으면 None)
+    with _keys_lock:
+        key = _current_keys.get(grid)
+    return None if key is None else forecast_cache.peek(key)
+
+
+def load_forecast(nx=NX, ny=NY, product=ULTRA):
+    base_date, base_time = product.get_base()
+    key = forecast_key(product, nx, ny, base_date, base_time)
+    fetch, _ = _forecast_fetcher(product, nx, ny, base_date, base_time)
+    try:
+        forecast = forecast_cache.get(key, fetch, product.expiration)
+    except Exception:
+        return _fallback((product.name, nx, ny))
+    _promote((product.name, nx, ny), key)
+    return forecast
+
+
+async def load_forecast_async(nx=NX, ny=NY, product=ULTRA):
+    base_date, base_time = product.get_base()
+    key = forecast_key(product, nx, ny, base_date, base_time)
+    _, fetch = _forecast_fetcher(product, nx, ny, base_date, base_time)
+    try:
+        forecast = await forecast_cache.get_async(key, fetch, product.expiration)
+    except Exception:
+        return _fallback((product.name, nx, ny))
+    _promote((product.name, nx, ny), key)
+    return forecast
+
+
+def _next_hours(now):
+    # 다음 정시부터 한 시간씩
+    hour = now.replace(minute=0, second=0, microsecond=0)
+    while True:
+        hour += timedelta(hours=1)
+        yield hour
+
+
+def weather_window(forecast, now=None):
+    # 현재 시각 기준으로 WINDOW_HOURS 시간치 반환
     result = []
-    for i in range(1, 5):
-        hour_str = f"{(now_hour + i) % 24:02d}00"
-        data = weather_by_time.get(hour_str, {})
-        display_hour = format_hour(now_hour + i - 1)
-
-        # 시간 문자열 예: '오전 5시', '오후 3시'
-        hour_str = display_hour  # 예: '오전 5시'
-        match = re.search(r'오전|오후\s*(\d+)시', hour_str)
-
-        if match:
-            am_pm = '오전' if '오전' in hour_str else '오후'
-            hour = int(re.search(r'(\d+)시', hour_str).group(1))
-
-            # 오전 5시~오후 8시 => 낮
-            if (am_pm == '오전' and hour >= 5) or (am_pm == '오후' and hour <= 8):
-                is_night = False  # 낮
-            else:
-                is_night = True  # 밤
-
-            # 오후 12시 낮으로 처리
-            if am_pm == '오후' and hour == 12:
-                is_night = False
-        else:
-            is_night = True  # 시간 정보 없으면 기본 밤
+    for _, dt in zip(range(WINDOW_HOURS), _next_hours(now or datetime.now(kst))):
+        result.append(forecast.get(dt.strftime("%Y%m%d%H00")) or EMPTY_RECORDS[dt.hour])
+    return result
+
 
-        # 하늘 상태
-        sky_dict = {'1': '맑음', '3': '구름많음', '4': '흐림'}
-        sky = sky_dict.get(data.get('SKY', '1'), '정보없음')
+def merge_timeline(ultra, village, now=None):
+    """
+    초단기예보(6시간)와 단기예보(3일)를 한 시간 단위로 합침 (겹치는 시간은 초단기예보 우선).
+    내일 TIMELINE_END_HOUR 시까지, 두 예보 모두 없는 시간은 건너뜀.
+    """
+    now = now or datetime.now(kst)
+    end = (now + timedelta(days=1)).replace(hour=TIMELINE_END_HOUR, minute=0, second=0, microsecond=0)
+    timeline = []
+    for dt in _next_hours(now):
+        # 항목의 time 은 예보 시각의 한 시간 전 (weather_window 와 같은 기준)
+        shown = dt - timedelta(hours=1)
+        if shown > end:
+            break
+        key = dt.strftime("%Y%m%d%H00")
+        if key in ultra:
+            record, source = ultra[key], ULTRA.name
+        elif key in village:
+            record, source = village[key], VILLAGE.name
+        else:
+            continue
+        timeline.append({"date": shown.date().isoformat(), **format_weather_hour(record), "source": source})
+    return timeline
 
-        # 기온
-        tmp = data.get('T1H', '0')
 
-        # 습도
-        reh = data.get('REH', '0')
+def fetch_weather_json(nx=NX, ny=NY):
+    forecast = load_forecast(nx, ny)
+    if forecast is None:
+        return {"error": "API 요청 실패"}
+    return weather_window(forecast)
 
-        # 강수량
-        pcp = data.get('RN1', '강수없음')
 
-        # 풍속
-        wind = data.get('WSD', '없음')
+async def fetch_weather_json_async(nx=NX, ny=NY):
+    forecast = await load_forecast_async(nx, ny)
+    if forecast is None:
+        return {"error": "API 요청 실패"}
+    return weather_window(forecast)
 
-        if wind == '없음':
-            wind_status = '정보 없음'
-        else:
-            wind_value = float(wind)  # 문자열이면 float으로 변환
-            if wind_value >= 9:
-                wind_status = '강한 바람'
-            elif wind_value >= 4:
-                wind_status = '약간 강한 바람'
-            else:
-                wind_status = '약한 바람'
-
-        # 하늘 상태 + 시간 -> 기본 코드
-        sky_code_map = {
-            ('맑음', True): 1,
-            ('맑음', False): 2,
-            ('구름많음', True): 3,
-            ('구름많음', False): 4,
-            ('흐림', True): 5,
-            ('흐림', False): 6
-        }
-
-        # PTY 처리
-        pty_code_map = {
-            '0': None,
-            '1': '비', '4': '비', '5': '비',
-            '2': '비+눈', '6': '비+눈',
-            '3': '눈', '7': '눈'
-        }
-        pty = pty_code_map.get(data.get('PTY', '0'))
-
-        # 최종 코드 결정
-        if pty:
-            pty_number_map = {'비': 7, '비+눈': 8, '눈': 9}
-            final_code = pty_number_map[pty]
-        else:
-            final_code = sky_code_map.get((sky, is_night), 0)
-
-        result.append({
-            "time": display_hour,
-            "sky": sky,
-            "temp": tmp,
-            "humidity": reh,
-            "precipitation_type": pty if pty else '없음',
-            "precipitation_amount": pcp,
-            "sky_code": final_code,
-            "wind": wind_status
-        })
 
-    return result
+async def fetch_timeline_async(nx=NX, ny=NY):
+    ultra, village = await asyncio.gather(
+        load_forecast_async(nx, ny, ULTRA),
+        load_forecast_async(nx, ny, VILLAGE),
+    )
+    if ultra is None and village is None:
+        return {"error": "API 요청 실패"}
+    return merge_timeline(ultra or {}, village or {})
 
 
 if __name__ == "__main__":
     import json
     weather_data = fetch_weather_json()
-    print(json.dumps(weather_data, ensure_ascii=False, indent=2))
+    print(json.dumps(present_weather(weather_data), ensure_ascii=False, indent=2))